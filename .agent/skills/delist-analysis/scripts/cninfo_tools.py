@@ -16,12 +16,19 @@ from __future__ import annotations
 
 import argparse
 import csv
+import itertools
 import json
+import math
 import os
+import random
+import re
 import sys
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from zoneinfo import ZoneInfo
 
 import requests
@@ -34,6 +41,9 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
+# 公告时间戳统一按北京时间解析
+SHANGHAI_TZ = ZoneInfo("Asia/Shanghai")
+
 
 class CNINFOClient:
     """巨潮资讯API客户端"""
@@ -53,16 +63,116 @@ class CNINFOClient:
         "X-Requested-With": "XMLHttpRequest"
     }
 
+    # PDF下载需要使用不同的headers（值为 None 的键会从 Session 默认headers中移除）
+    PDF_HEADERS = {
+        "Accept": "application/pdf,*/*",
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Host": None,
+        "Origin": None,
+        "Content-Type": None,
+        "X-Requested-With": None,
+    }
+
+    # 连接池大小：保持 keep-alive 连接，跨请求复用
+    POOL_CONNECTIONS = 4
+    POOL_MAXSIZE = 16
+
+    # 公告列表分页大小，以及分页并发预取的线程数（控制对巨潮的访问压力）
+    PAGE_SIZE = 30
+    PAGE_WORKERS = 4
+
+    # 应用层重试（指数退避 + 抖动），覆盖适配器 Retry 不处理的连接重置、超时和JSON解析错误
+    RETRY_BASE_DELAY = 1.0
+    RETRY_MAX_DELAY = 30.0
+
+    # orgId 缓存文件：stock_code -> orgId 映射基本不变，避免每次调用都查询API
+    ORG_ID_CACHE_FILE = Path("temp") / "orgid_cache.json"
+
+    # 下载块大小：过小的块会让 Python 层循环开销占主导
+    DOWNLOAD_CHUNK = 128 * 1024
+
     def __init__(self, timeout: int = 30, max_retries: int = 3):
         self.timeout = timeout
+        self.max_retries = max_retries
         self.session = requests.Session()
         self.session.headers.update(self.HEADERS)
         retries = Retry(total=max_retries, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-        self.session.mount('http://', HTTPAdapter(max_retries=retries))
-        self.session.mount('https://', HTTPAdapter(max_retries=retries))
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE,
+            max_retries=retries
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # 查询接口（www.cninfo.com.cn 上的 POST）由 _post_with_retry 负责重试和退避；
+        # urllib3 的连接错误重试不区分方法，这里挂载不重试的适配器，避免两层重试叠加。
+        # PDF 下载（static.cninfo.com.cn）仍走上面带重试的适配器
+        self.session.mount('http://www.cninfo.com.cn/', HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE,
+            max_retries=0
+        ))
+        self._org_id_cache = self._load_org_id_cache()
+        # 批量分析多线程共享同一个客户端，orgId 缓存的更新与落盘需互斥
+        self._org_id_lock = threading.Lock()
+
+    def close(self) -> None:
+        """关闭 Session 释放连接"""
+        self.session.close()
+
+    def _load_org_id_cache(self) -> Dict[str, str]:
+        """加载 orgId 磁盘缓存（尽力而为，失败返回空缓存）"""
+        try:
+            with open(self.ORG_ID_CACHE_FILE, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            return cache if isinstance(cache, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_org_id_cache(self, snapshot: Dict[str, str]) -> None:
+        """原子写入 orgId 磁盘缓存快照（临时文件名按进程和线程区分，避免并发写同一文件）"""
+        tmp_path = self.ORG_ID_CACHE_FILE.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.ORG_ID_CACHE_FILE.parent.mkdir(exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.ORG_ID_CACHE_FILE)
+        except OSError as e:
+            print(f"Warning: failed to save orgId cache: {e}", file=sys.stderr)
+
+    def _post_with_retry(self, url: str, data: Dict[str, Any]) -> Any:
+        """
+        POST 请求并解析JSON
+        
+        可恢复错误（连接错误、超时、5xx、429、JSON解析失败）按指数退避加随机抖动重试，
+        其余 4xx 错误直接抛出。
+        """
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries):
+            try:
+                response = self.session.post(url, data=data, timeout=self.timeout)
+                response.raise_for_status()
+                return response.json()
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status is not None and 400 <= status < 500 and status != 429:
+                    raise
+                last_error = e
+            except (requests.exceptions.RequestException, ValueError) as e:
+                last_error = e
+
+            if attempt < self.max_retries - 1:
+                delay = min(self.RETRY_MAX_DELAY, self.RETRY_BASE_DELAY * 2 ** attempt)
+                time.sleep(delay * (1 + random.random() * 0.5))
+
+        raise last_error or RuntimeError(f"请求失败: {url}")
 
     def _get_org_id(self, stock_code: str) -> Optional[str]:
         """获取股票的orgId"""
+        cached = self._org_id_cache.get(stock_code)
+        if cached:
+            return cached
+
         # 先尝试构造
         if stock_code.startswith('6'):
             constructed = f"gssh0{stock_code}"
@@ -75,29 +185,57 @@ class CNINFOClient:
 
         # 通过API查询验证
         try:
-            response = self.session.post(
-                self.STOCK_INFO_URL,
-                data={"keyWord": stock_code},
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            result = response.json()
-            if isinstance(result, list):
-                for item in result:
-                    if item.get("code") == stock_code:
-                        return item.get("orgId", constructed)
+            result = self._post_with_retry(self.STOCK_INFO_URL, {"keyWord": stock_code})
         except Exception:
-            pass
+            return constructed
+
+        if isinstance(result, list):
+            for item in result:
+                if isinstance(item, dict) and item.get("code") == stock_code:
+                    org_id = item.get("orgId")
+                    if not org_id:
+                        return constructed
+                    # 仅缓存API确认的结果，查询失败时的构造值不落盘
+                    with self._org_id_lock:
+                        self._org_id_cache[stock_code] = org_id
+                        self._save_org_id_cache(dict(self._org_id_cache))
+                    return org_id
 
         return constructed
 
+    def _fetch_page(
+        self,
+        stock_code: str,
+        org_id: str,
+        page_num: int,
+        keyword: str,
+        sort: str,
+        date_range: str
+    ) -> Dict[str, Any]:
+        """获取公告列表的单页数据，失败时抛出异常"""
+        data = {
+            "pageNum": page_num,
+            "pageSize": self.PAGE_SIZE,
+            "column": "szse",
+            "tabName": "fulltext",
+            "stock": f"{stock_code},{org_id}",
+            "searchkey": keyword,
+            "category": "",
+            "seDate": date_range,  # 使用传入的日期范围
+            "sortName": "time",
+            "sortType": sort,
+            "isHLtitle": "false"
+        }
+        return self._post_with_retry(self.STOCK_QUERY_URL, data)
+
     def list_announcements(
         self,
         stock_code: str,
         keyword: str = "",
         sort: str = "desc",
         limit: int = 30,
-        date_range: str = ""  # 新增：日期范围 "YYYY-MM-DD~YYYY-MM-DD"
+        date_range: str = "",  # 新增：日期范围 "YYYY-MM-DD~YYYY-MM-DD"
+        since: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         获取股票公告列表
@@ -108,71 +246,83 @@ class CNINFOClient:
             sort: 排序方式 asc/desc
             limit: 返回数量限制
             date_range: 日期范围（可选），格式 "YYYY-MM-DD~YYYY-MM-DD"
+            since: 只返回该日期（含）之后的公告（可选），格式 "YYYY-MM-DD"；
+                   未指定 date_range 时同时作为服务端日期过滤，desc 排序下遇到更早的公告即停止翻页
             
         Returns:
             公告列表 [{date, title, id, url}, ...]
         """
+        if since and not date_range:
+            date_range = f"{since}~{datetime.now(SHANGHAI_TZ).strftime('%Y-%m-%d')}"
+
         org_id = self._get_org_id(stock_code)
         all_announcements = []
         page_num = 1
-        page_size = 30
-
-        while len(all_announcements) < limit:
-            data = {
-                "pageNum": page_num,
-                "pageSize": page_size,
-                "column": "szse",
-                "tabName": "fulltext",
-                "stock": f"{stock_code},{org_id}",
-                "searchkey": keyword,
-                "category": "",
-                "seDate": date_range,  # 使用传入的日期范围
-                "sortName": "time",
-                "sortType": sort,
-                "isHLtitle": "false"
-            }
-
-            try:
-                response = self.session.post(
-                    self.STOCK_QUERY_URL, data=data, timeout=self.timeout
-                )
-                response.raise_for_status()
-                response_data = response.json()
-            except Exception as e:
-                print(f"Error fetching announcements: {e}", file=sys.stderr)
-                break
+        known_pages = 0  # 根据首页 totalAnnouncement 估算的总页数，0 表示未知
+        done = False
 
-            announcements = response_data.get("announcements", [])
-            if not announcements:
-                break
+        def fetch(num: int) -> Dict[str, Any]:
+            return self._fetch_page(stock_code, org_id, num, keyword, sort, date_range)
 
-            for ann in announcements:
-                if len(all_announcements) >= limit:
-                    break
-                    
-                ann_time = ann.get("announcementTime", 0)
-                if ann_time:
-                    tz = ZoneInfo("Asia/Shanghai")
-                    dt = datetime.fromtimestamp(ann_time / 1000, tz=tz)
-                    date_str = dt.strftime("%Y-%m-%d")
+        # 首页单独请求以获取总数，之后按窗口并发预取剩余页
+        with ThreadPoolExecutor(max_workers=self.PAGE_WORKERS) as executor:
+            while not done and len(all_announcements) < limit:
+                if page_num == 1:
+                    window = 1
                 else:
-                    date_str = ""
-
-                adjunct_url = ann.get("adjunctUrl", "")
-                full_url = f"http://static.cninfo.com.cn/{adjunct_url}" if adjunct_url else ""
-
-                all_announcements.append({
-                    "date": date_str,
-                    "title": ann.get("announcementTitle", ""),
-                    "id": str(ann.get("announcementId", "")),
-                    "url": full_url,
-                    "secName": ann.get("secName", "")
-                })
-
-            if not response_data.get("hasMore", False):
-                break
+                    window = math.ceil((limit - len(all_announcements)) / self.PAGE_SIZE)
+                    if known_pages >= page_num:
+                        window = min(window, known_pages - page_num + 1)
+                page_nums = range(page_num, page_num + window)
 
-            page_num += 1
+                try:
+                    for response_data in executor.map(fetch, page_nums):
+                        if page_num == 1:
+                            total = response_data.get("totalAnnouncement")
+                            if isinstance(total, int) and total > 0:
+                                known_pages = math.ceil(total / self.PAGE_SIZE)
+
+                        announcements = response_data.get("announcements", [])
+                        if not announcements:
+                            done = True
+                            break
+
+                        for ann in announcements:
+                            if len(all_announcements) >= limit:
+                                break
+
+                            ann_time = ann.get("announcementTime", 0)
+                            if ann_time:
+                                dt = datetime.fromtimestamp(ann_time / 1000, tz=SHANGHAI_TZ)
+                                date_str = dt.strftime("%Y-%m-%d")
+                            else:
+                                date_str = ""
+
+                            if since and date_str and date_str < since:
+                                if sort == "desc":
+                                    # 降序排列，之后的公告只会更早
+                                    done = True
+                                    break
+                                continue
+
+                            adjunct_url = ann.get("adjunctUrl", "")
+                            full_url = f"http://static.cninfo.com.cn/{adjunct_url}" if adjunct_url else ""
+
+                            all_announcements.append({
+                                "date": date_str,
+                                "title": ann.get("announcementTitle", ""),
+                                "id": str(ann.get("announcementId", "")),
+                                "url": full_url,
+                                "secName": ann.get("secName", "")
+                            })
+
+                        page_num += 1
+                        if done or not response_data.get("hasMore", False):
+                            done = True
+                            break
+                except Exception as e:
+                    print(f"Error fetching announcements: {e}", file=sys.stderr)
+                    break
 
         return all_announcements[:limit]
 
@@ -188,22 +338,15 @@ class CNINFOClient:
             是否成功
         """
         try:
-            # PDF下载需要使用不同的headers
-            pdf_headers = {
-                "Accept": "application/pdf,*/*",
-                "Accept-Encoding": "gzip, deflate",
-                "Accept-Language": "zh-CN,zh;q=0.9",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Referer": "http://www.cninfo.com.cn/new/disclosure/stock",
-            }
-            
-            response = requests.get(url, headers=pdf_headers, timeout=self.timeout, stream=True, allow_redirects=True)
+            # 复用 Session 连接池，避免每次下载重新握手
+            response = self.session.get(
+                url, headers=self.PDF_HEADERS, timeout=self.timeout, stream=True, allow_redirects=True
+            )
             response.raise_for_status()
 
             with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+                for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK):
+                    f.write(chunk)
 
             return os.path.getsize(output_path) > 0
         except Exception as e:
@@ -211,6 +354,74 @@ class CNINFOClient:
             return False
 
 
+_default_client: Optional[CNINFOClient] = None
+
+
+def get_client() -> CNINFOClient:
+    """获取进程内共享的 CNINFOClient（复用同一个 Session）"""
+    global _default_client
+    if _default_client is None:
+        _default_client = CNINFOClient()
+    return _default_client
+
+
+def _iter_pdf_text_pdfium(pdfium, pdf_path: str, max_pages: int) -> Iterator[str]:
+    """使用 pypdfium2 (PDFium C++ 实现) 逐页提取文本"""
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        for i in range(min(max_pages, len(pdf))):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            try:
+                page_text = textpage.get_text_range().replace("\r\n", "\n")
+            finally:
+                textpage.close()
+                page.close()
+            if page_text.strip():
+                yield f"--- Page {i+1} ---\n{page_text}"
+    finally:
+        pdf.close()
+
+
+def _iter_pdf_text_pdfplumber(pdf_path: str, max_pages: int) -> Iterator[str]:
+    """使用 pdfplumber 逐页提取文本，每页提取后立即释放页面缓存"""
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        for i, page in enumerate(itertools.islice(pdf.pages, max_pages)):
+            page_text = page.extract_text()
+            page.close()
+            if page_text:
+                yield f"--- Page {i+1} ---\n{page_text}"
+
+
+def iter_pdf_text(pdf_path: str, max_pages: int = 10) -> Iterator[str]:
+    """
+    逐页提取PDF文本，内存占用与页数无关
+    
+    优先使用 pypdfium2（比 pdfplumber 快一个数量级），未安装时回退到 pdfplumber。
+    
+    Args:
+        pdf_path: PDF文件路径
+        max_pages: 最大提取页数
+        
+    Yields:
+        每页文本 "--- Page N ---\n..."（空白页跳过），出错时抛出异常
+    """
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        yield from _iter_pdf_text_pdfplumber(pdf_path, max_pages)
+    else:
+        yield from _iter_pdf_text_pdfium(pdfium, pdf_path, max_pages)
+
+
+def _print_extract_error(e: Exception) -> None:
+    if isinstance(e, ImportError):
+        print("Error: no PDF library installed. Run: pip install pypdfium2 (or pdfplumber)", file=sys.stderr)
+    else:
+        print(f"Error extracting text: {e}", file=sys.stderr)
+
+
 def extract_text_from_pdf(pdf_path: str, max_pages: int = 10) -> str:
     """
     从PDF提取文本
@@ -223,56 +434,63 @@ def extract_text_from_pdf(pdf_path: str, max_pages: int = 10) -> str:
         提取的文本内容
     """
     try:
-        import pdfplumber
-        text_parts = []
-        with pdfplumber.open(pdf_path) as pdf:
-            for i, page in enumerate(pdf.pages[:max_pages]):
-                page_text = page.extract_text()
-                if page_text:
-                    text_parts.append(f"--- Page {i+1} ---\n{page_text}")
-        return "\n\n".join(text_parts)
-    except ImportError:
-        print("Error: pdfplumber not installed. Run: pip install pdfplumber", file=sys.stderr)
-        return ""
+        return "\n\n".join(iter_pdf_text(pdf_path, max_pages))
     except Exception as e:
-        print(f"Error extracting text: {e}", file=sys.stderr)
+        _print_extract_error(e)
         return ""
 
 
-def append_result_to_csv(csv_path: str, data: Dict[str, Any]) -> bool:
+# 结果CSV表头
+RESULT_CSV_HEADERS = [
+    "code", "名称", "退市日期", "退市原因", "退市类型",
+    "首次退市通知日", "置换标的code", "置换标的名称", "置换比例",
+    "置换完成日期", "来源公告", "公告URL"
+]
+
+
+def append_results_to_csv(csv_path: str, data_list: List[Dict[str, Any]]) -> bool:
     """
-    追加结果到CSV文件
+    批量追加结果到CSV文件（只打开一次文件）
     
     Args:
         csv_path: CSV文件路径
-        data: 要追加的数据字典
+        data_list: 要追加的数据字典列表
         
     Returns:
         是否成功
     """
-    headers = [
-        "code", "名称", "退市日期", "退市原因", "退市类型",
-        "首次退市通知日", "置换标的code", "置换标的名称", "置换比例",
-        "置换完成日期", "来源公告", "公告URL"
-    ]
-
     file_exists = os.path.exists(csv_path)
 
     try:
         with open(csv_path, 'a', newline='', encoding='utf-8-sig') as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
+            writer = csv.DictWriter(f, fieldnames=RESULT_CSV_HEADERS)
             if not file_exists:
                 writer.writeheader()
             
             # 确保所有字段都有值
-            row = {h: data.get(h, "NaN") for h in headers}
-            writer.writerow(row)
+            writer.writerows(
+                {h: data.get(h, "NaN") for h in RESULT_CSV_HEADERS} for data in data_list
+            )
         return True
     except Exception as e:
         print(f"Error appending to CSV: {e}", file=sys.stderr)
         return False
 
 
+def append_result_to_csv(csv_path: str, data: Dict[str, Any]) -> bool:
+    """
+    追加结果到CSV文件
+    
+    Args:
+        csv_path: CSV文件路径
+        data: 要追加的数据字典
+        
+    Returns:
+        是否成功
+    """
+    return append_results_to_csv(csv_path, [data])
+
+
 # 退市类型定义
 DELIST_TYPES = {
     "MERGE": "吸收合并退市",
@@ -308,6 +526,13 @@ OPTIONAL_FIELDS = [
     # 无可选字段
 ]
 
+# 日期字段及格式
+DATE_FIELDS = ["退市日期", "首次退市通知日", "置换完成日期"]
+DATE_FORMAT = "%Y-%m-%d"
+
+# 置换比例格式 "1:X.XXXX"
+RATIO_PATTERN = re.compile(r'^\d+:\d+\.?\d*$')
+
 
 def validate_result(data: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -351,13 +576,13 @@ def validate_result(data: Dict[str, Any]) -> Dict[str, Any]:
                 "message": f"股票代码格式错误: '{code}'，应为6位数字字符串（如 '000001'）"
             })
     
-    # 3. 检查日期格式
-    date_fields = ["退市日期", "首次退市通知日", "置换完成日期"]
-    for field in date_fields:
+    # 3. 检查日期格式（每个日期只解析一次，供后续逻辑检查复用）
+    parsed_dates = {}
+    for field in DATE_FIELDS:
         value = data.get(field, "")
         if value and value != "NaN":
             try:
-                datetime.strptime(value, "%Y-%m-%d")
+                parsed_dates[field] = datetime.strptime(value, DATE_FORMAT)
             except ValueError:
                 errors.append({
                     "type": "INVALID_FORMAT",
@@ -370,18 +595,14 @@ def validate_result(data: Dict[str, Any]) -> Dict[str, Any]:
     delist_date = data.get("退市日期", "")
     
     # 4. 首次通知日 < 退市日期
-    if first_notice and delist_date and first_notice != "NaN" and delist_date != "NaN":
-        try:
-            d1 = datetime.strptime(first_notice, "%Y-%m-%d")
-            d2 = datetime.strptime(delist_date, "%Y-%m-%d")
-            if d1 >= d2:
-                errors.append({
-                    "type": "LOGIC_ERROR",
-                    "field": "首次退市通知日",
-                    "message": f"首次退市通知日({first_notice})应早于退市日期({delist_date})"
-                })
-        except ValueError:
-            pass
+    d1 = parsed_dates.get("首次退市通知日")
+    d2 = parsed_dates.get("退市日期")
+    if d1 is not None and d2 is not None and d1 >= d2:
+        errors.append({
+            "type": "LOGIC_ERROR",
+            "field": "首次退市通知日",
+            "message": f"首次退市通知日({first_notice})应早于退市日期({delist_date})"
+        })
     
     # 5. 检查退市类型
     delist_type = data.get("退市类型", "")
@@ -408,8 +629,7 @@ def validate_result(data: Dict[str, Any]) -> Dict[str, Any]:
         # 检查置换比例格式
         ratio = data.get("置换比例", "")
         if ratio and ratio != "NaN":
-            import re
-            if not re.match(r'^\d+:\d+\.?\d*$', ratio):
+            if not RATIO_PATTERN.match(ratio):
                 errors.append({
                     "type": "INVALID_FORMAT",
                     "field": "置换比例",
@@ -511,30 +731,68 @@ RISK_KEYWORDS = {
     ]
 }
 
+# 预编译风险关键词：每个等级一个有序模式列表，外加全部模式的合并正则用于快速排除
+COMPILED_RISK_KEYWORDS = {
+    level: [(keyword, re.compile(keyword)) for keyword in keywords]
+    for level, keywords in RISK_KEYWORDS.items()
+}
+ALL_RISK_PATTERN = re.compile(
+    "|".join(f"(?:{kw})" for keywords in RISK_KEYWORDS.values() for kw in keywords)
+)
+
+# 退市相关关键词（filter-delist 使用）
+DELIST_KEYWORDS = [
+    "吸收合并", "换股", "终止上市", "摘牌", "退市",
+    "停牌", "预案", "要约收购", "主动退市",
+    "触发退市", "退市整理", "股东大会.*决议",
+    "证券简称", "证券代码变更"  # RECODE 更名换码
+]
+COMPILED_DELIST_KEYWORDS = [(kw, re.compile(kw)) for kw in DELIST_KEYWORDS]
+ALL_DELIST_PATTERN = re.compile("|".join(f"(?:{kw})" for kw in DELIST_KEYWORDS))
+
 
-def scan_delist_risk(announcements: List[Dict[str, Any]]) -> Dict[str, Any]:
+def match_delist_keyword(title: str) -> Optional[str]:
+    """
+    返回标题命中的第一个退市关键词（按 DELIST_KEYWORDS 顺序），未命中返回 None
+    """
+    # 合并正则一次扫描即可排除绝大多数无关公告
+    if not ALL_DELIST_PATTERN.search(title):
+        return None
+    for kw, pattern in COMPILED_DELIST_KEYWORDS:
+        if pattern.search(title):
+            return kw
+    return None
+
+
+# scan-risk 单次扫描的公告数量上限（实际数量由 --days 截止日期决定）
+SCAN_RISK_MAX_ANNOUNCEMENTS = 1000
+
+
+def scan_delist_risk(announcements: List[Dict[str, Any]], early_exit: bool = False) -> Dict[str, Any]:
     """
     扫描公告列表，检测退市风险信号
     
     Args:
         announcements: 公告列表
+        early_exit: 发现 CRITICAL 信号后立即停止扫描剩余公告
         
     Returns:
         风险扫描结果 {"risk_level": str, "signals": [...]}
     """
-    import re
-    
     signals = []
     highest_level = None
     level_priority = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
     
     for ann in announcements:
         title = ann.get("title", "")
+        # 合并正则未命中则不可能命中任何单个关键词
+        if not ALL_RISK_PATTERN.search(title):
+            continue
         date = ann.get("date", "")
         
-        for level, keywords in RISK_KEYWORDS.items():
-            for keyword in keywords:
-                if re.search(keyword, title):
+        for level, patterns in COMPILED_RISK_KEYWORDS.items():
+            for keyword, pattern in patterns:
+                if pattern.search(title):
                     signals.append({
                         "level": level,
                         "date": date,
@@ -547,9 +805,14 @@ def scan_delist_risk(announcements: List[Dict[str, Any]]) -> Dict[str, Any]:
                     if highest_level is None or level_priority[level] < level_priority[highest_level]:
                         highest_level = level
                     break  # 一个公告只匹配一个等级
+        
+        # 已是最高风险等级，剩余公告不会改变结论
+        if early_exit and highest_level == "CRITICAL":
+            break
     
     # 按风险等级和日期排序
-    signals.sort(key=lambda x: (level_priority.get(x["level"], 99), x["date"]))
+    if len(signals) > 1:
+        signals.sort(key=lambda x: (level_priority.get(x["level"], 99), x["date"]))
     
     return {
         "risk_level": highest_level or "NONE",
@@ -596,6 +859,7 @@ def main():
     scan_parser = subparsers.add_parser("scan-risk", help="扫描股票退市风险")
     scan_parser.add_argument("stock_code", help="股票代码")
     scan_parser.add_argument("--days", "-d", type=int, default=30, help="扫描最近N天的公告")
+    scan_parser.add_argument("--early-exit", action="store_true", help="发现 CRITICAL 信号后立即停止扫描")
 
     # filter-delist: 筛选退市相关公告
     filter_parser = subparsers.add_parser("filter-delist", help="筛选退市相关公告")
@@ -607,7 +871,7 @@ def main():
     args = parser.parse_args()
 
     if args.command == "list-announcements":
-        client = CNINFOClient()
+        client = get_client()
         results = client.list_announcements(
             args.stock_code,
             keyword=args.keyword,
@@ -654,7 +918,7 @@ def main():
             print(f"解决方法: 请先执行 filter-delist 命令获取准确的公告URL", file=sys.stderr)
             sys.exit(1)
         
-        client = CNINFOClient()
+        client = get_client()
         success = client.download_pdf(args.url, args.output)
         if success:
             print(json.dumps({"success": True, "path": args.output, "verified": verified}))
@@ -663,9 +927,18 @@ def main():
             sys.exit(1)
 
     elif args.command == "extract-text":
-        text = extract_text_from_pdf(args.pdf_path, args.max_pages)
-        if text:
-            print(text)
+        # 逐页输出，调用方无需等待整个PDF提取完成
+        has_text = False
+        try:
+            for page_text in iter_pdf_text(args.pdf_path, args.max_pages):
+                sys.stdout.write(f"\n\n{page_text}" if has_text else page_text)
+                sys.stdout.flush()
+                has_text = True
+        except Exception as e:
+            _print_extract_error(e)
+            has_text = False
+        if has_text:
+            sys.stdout.write("\n")
         else:
             print("Failed to extract text", file=sys.stderr)
             sys.exit(1)
@@ -685,10 +958,7 @@ def main():
             sys.exit(1)
 
         if isinstance(data, list):
-            success = True
-            for item in data:
-                if not append_result_to_csv(args.csv, item):
-                    success = False
+            success = append_results_to_csv(args.csv, data)
         else:
             success = append_result_to_csv(args.csv, data)
             
@@ -729,22 +999,21 @@ def main():
                 sys.exit(1)
 
     elif args.command == "scan-risk":
-        client = CNINFOClient()
+        client = get_client()
         # 获取最近的公告
-        announcements = client.list_announcements(
+        # 只获取最近N天的公告（按日期截止，翻页遇到更早的公告即停止）
+        # 与 list_announcements 的日期上界一致按北京时间计算，避免非东八区主机在零点前后差一天
+        cutoff_date = (datetime.now(SHANGHAI_TZ) - timedelta(days=args.days)).strftime("%Y-%m-%d")
+        recent = client.list_announcements(
             args.stock_code,
             keyword="",
             sort="desc",
-            limit=args.days * 3  # 假设每天最多3个公告
+            limit=SCAN_RISK_MAX_ANNOUNCEMENTS,
+            since=cutoff_date
         )
         
-        # 过滤最近N天的公告
-        from datetime import datetime, timedelta
-        cutoff_date = (datetime.now() - timedelta(days=args.days)).strftime("%Y-%m-%d")
-        recent = [a for a in announcements if a.get("date", "") >= cutoff_date]
-        
         # 扫描风险
-        result = scan_delist_risk(recent)
+        result = scan_delist_risk(recent, early_exit=args.early_exit)
         result["stock_code"] = args.stock_code
         result["scan_days"] = args.days
         result["announcement_count"] = len(recent)
@@ -757,7 +1026,7 @@ def main():
 
     elif args.command == "filter-delist":
         # 筛选退市相关公告
-        client = CNINFOClient()
+        client = get_client()
         
         # 构造日期范围
         date_range = ""
@@ -766,7 +1035,6 @@ def main():
             date_range = f"{args.after_date}~{args.before_date}"
         elif args.before_date:
             # 只指定了截止日期，向前搜索18个月（退市通知通常在退市前6-18个月）
-            from datetime import datetime, timedelta
             try:
                 before_dt = datetime.strptime(args.before_date, "%Y-%m-%d")
                 # 向前推 18 个月（约 540 天）
@@ -777,7 +1045,6 @@ def main():
                 sys.exit(1)
         elif args.after_date:
             # 只指定了开始日期，向后搜索18个月
-            from datetime import datetime, timedelta
             try:
                 after_dt = datetime.strptime(args.after_date, "%Y-%m-%d")
                 before_dt = after_dt + timedelta(days=540)
@@ -795,23 +1062,13 @@ def main():
             date_range=date_range
         )
         
-        # 退市相关关键词
-        delist_keywords = [
-            "吸收合并", "换股", "终止上市", "摘牌", "退市",
-            "停牌", "预案", "要约收购", "主动退市",
-            "触发退市", "退市整理", "股东大会.*决议",
-            "证券简称", "证券代码变更"  # RECODE 更名换码
-        ]
-        
-        import re
+        # 筛选退市相关公告
         filtered = []
         for ann in announcements:
-            title = ann.get("title", "")
-            for kw in delist_keywords:
-                if re.search(kw, title):
-                    ann["matched_keyword"] = kw
-                    filtered.append(ann)
-                    break
+            kw = match_delist_keyword(ann.get("title", ""))
+            if kw is not None:
+                ann["matched_keyword"] = kw
+                filtered.append(ann)
         
         # 输出结果
         result = {
@@ -9,19 +9,44 @@
 
 from __future__ import annotations
 
+import csv
 import logging
 import os
 import re
+import threading
 import warnings
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from multiprocessing import Pool, cpu_count
+import multiprocessing
+from multiprocessing import cpu_count
+from operator import itemgetter
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List
 
 from tqdm import tqdm
 import pandas as pd
 import pdfplumber
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    import pdfplumber_rs  # 可选依赖：Rust实现、接口与pdfplumber一致，表格提取更快
+except ImportError:
+    pdfplumber_rs = None
+
+try:
+    import pikepdf  # 可选依赖：基于 qpdf 的结构校验，毫秒级发现截断/损坏的PDF
+except ImportError:
+    pikepdf = None
+
+try:
+    import pyarrow as pa  # 可选依赖：output_format="parquet" 时使用
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
 
 # 抑制pdfplumber的CropBox警告
 warnings.filterwarnings('ignore', message='.*CropBox.*')
@@ -42,28 +67,42 @@ class ConverterConfig:
     target_year: int  # 目标年份
     max_retries: int = 3  # 下载最大重试次数
     timeout: int = 15  # 请求超时时间（秒）
-    chunk_size: int = 8192  # 下载块大小
+    chunk_size: int = 1 << 20  # 下载块大小（年报PDF多为数MB，大块读写减少系统调用）
     processes: Optional[int] = None  # 进程数，None表示自动
+    download_workers: Optional[int] = None  # 下载线程数，None表示进程数的2倍
+    backend: str = "auto"  # PDF解析后端：auto（已安装 pdfplumber_rs 时优先）/ pdfplumber / pdfplumber_rs
+    output_format: str = "csv"  # 表格输出格式：csv（每个表格一个CSV）/ parquet（每份报告一个ZSTD压缩的Parquet，需要pyarrow）
 
 
 class PDFDownloader:
     """PDF下载器类。"""
     
     HEADERS = {
-        "Accept-Encoding": "gzip, deflate, br",
+        # urllib3 可解码的压缩格式：未安装 brotli 时不声明 br，避免收到无法解压的响应
+        "Accept-Encoding": ACCEPT_ENCODING,
         "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
         "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
         "Sec-Fetch-Dest": "document",
         "Sec-Fetch-Mode": "navigate",
         "Sec-Fetch-Site": "same-origin",
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
     }
+    # 每个工作进程同一时刻只下载一个文件，少量长连接即可覆盖PDF所在的几个主机
+    POOL_CONNECTIONS = 4
+    POOL_MAXSIZE = 4
     
-    def __init__(self, timeout: int = 15, chunk_size: int = 8192) -> None:
+    def __init__(self, timeout: int = 15, chunk_size: int = 1 << 20) -> None:
         self.timeout = timeout
         self.chunk_size = chunk_size
         self.session = requests.Session()
         self.session.headers.update(self.HEADERS)
+        # 适配器只在创建 Session 时挂载一次；重试由 _download_with_retry 负责，适配器层不重试
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS, pool_maxsize=self.POOL_MAXSIZE, max_retries=0
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
     
     def close(self) -> None:
         """关闭Session释放资源。"""
@@ -92,13 +131,28 @@ class PDFDownloader:
                 logging.error(f"服务器返回的不是 PDF: {content_type}")
                 return False
             
-            with open(pdf_file_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=self.chunk_size):
-                    if chunk:
-                        f.write(chunk)
-            
-            if not self._verify_pdf(pdf_file_path):
-                return False
+            # 先写入 .part 临时文件，校验通过后再原子改名：中途失败不会留下
+            # 预分配后只写了一半、末尾全是零字节却能通过文件头检查的PDF
+            part_path = pdf_file_path + ".part"
+            try:
+                # 缓冲写入：不小于缓冲区的大块由 BufferedWriter 直接写到文件，并处理部分写入
+                with open(part_path, "wb") as f:
+                    total = self._expected_size(response)
+                    if total > 0:
+                        self._preallocate(f, total)
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                    # 实际写入少于预分配大小时截掉末尾空洞，避免残留零字节
+                    if total > 0 and f.tell() != total:
+                        f.truncate()
+                
+                if not self._verify_pdf(part_path):
+                    return False
+                os.replace(part_path, pdf_file_path)
+            finally:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
             
             logging.info(f"PDF 下载成功: {pdf_file_path}")
             return True
@@ -113,25 +167,82 @@ class PDFDownloader:
             logging.error(f"文件写入失败: {e}")
             return False
     
+    @staticmethod
+    def _expected_size(response: requests.Response) -> int:
+        """
+        返回落盘后的文件大小（未压缩响应的 Content-Length），未知时返回0。
+        gzip/deflate 压缩的响应中 Content-Length 是压缩后大小，不能用于预分配。
+        """
+        if response.headers.get("Content-Encoding", "identity").lower() != "identity":
+            return 0
+        try:
+            return max(int(response.headers.get("Content-Length", 0)), 0)
+        except ValueError:
+            return 0
+
+    @staticmethod
+    def _preallocate(f, total: int) -> None:
+        """按 Content-Length 一次性预分配文件空间，避免边写边扩展文件；不支持时跳过。"""
+        try:
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(f.fileno(), 0, total)
+            else:
+                f.truncate(total)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _read_pdf_head(pdf_file_path: str) -> bytes:
+        """一次打开读取文件前5个字节（空文件返回 b""），文件不存在时抛出 FileNotFoundError。"""
+        with open(pdf_file_path, "rb") as f:
+            return f.read(5)
+
+    @staticmethod
+    def _check_structure(pdf_file_path: str) -> bool:
+        """
+        安装 pikepdf 时校验PDF结构（能打开且至少有一页），未安装时视为通过。
+        只看文件头发现不了截断或中间损坏，这类文件会在 pdfplumber 完整解析时才失败。
+        """
+        if pikepdf is None:
+            return True
+        try:
+            with pikepdf.Pdf.open(pdf_file_path) as pdf:
+                return len(pdf.pages) > 0
+        except Exception:
+            return False
+
+    @staticmethod
+    def _is_valid_pdf(pdf_file_path: str) -> bool:
+        """静默检查PDF是否存在、非空、以 %PDF 开头且结构完整，供断点续传使用。"""
+        try:
+            if not PDFDownloader._read_pdf_head(pdf_file_path).startswith(b"%PDF"):
+                return False
+        except OSError:
+            return False
+        return PDFDownloader._check_structure(pdf_file_path)
+
     @staticmethod
     def _verify_pdf(pdf_file_path: str) -> bool:
         """验证PDF文件完整性。"""
-        if not os.path.exists(pdf_file_path):
+        try:
+            first_bytes = PDFDownloader._read_pdf_head(pdf_file_path)
+        except FileNotFoundError:
             logging.error(f"文件不存在: {pdf_file_path}")
             return False
+        except OSError as e:
+            logging.error(f"文件验证失败: {e}")
+            return False
         
-        if os.path.getsize(pdf_file_path) == 0:
+        if not first_bytes:
             logging.error(f"下载失败，文件大小为 0 KB: {pdf_file_path}")
             return False
         
-        try:
-            with open(pdf_file_path, "rb") as f:
-                first_bytes = f.read(5)
-                if not first_bytes.startswith(b"%PDF"):
-                    logging.error(f"下载的文件不是有效的 PDF: {pdf_file_path}")
-                    return False
-        except OSError as e:
-            logging.error(f"文件验证失败: {e}")
+        if not first_bytes.startswith(b"%PDF"):
+            logging.error(f"下载的文件不是有效的 PDF: {pdf_file_path}")
+            return False
+        
+        if not PDFDownloader._check_structure(pdf_file_path):
+            logging.error(f"PDF 结构损坏或不完整: {pdf_file_path}")
             return False
         
         return True
@@ -141,20 +252,50 @@ class PDFDownloader:
 class PDFTableExtractor:
     """PDF表格提取器类。"""
     
-    # 文件名非法字符正则
-    INVALID_CHARS = r'[\\/:*?"<>|]'
+    # 断点续传时视为已提取的输出文件后缀
+    OUTPUT_SUFFIXES = ('.csv', '.parquet')
     
-    def __init__(self, config: ConverterConfig) -> None:
+    # 文件名非法字符删除表：str.translate 逐字符查表，比正则替换快
+    INVALID_CHARS_TABLE = str.maketrans('', '', '\\/:*?"<>|')
+    # 章节标题模式（以数字或括号开头）及需要清理的序号前缀，类加载时编译一次
+    TITLE_PATTERN = re.compile(r'^[（(一二三四五六七八九十\d]')
+    TITLE_PAREN_PREFIX = re.compile(r'^[（(][一二三四五六七八九十]+[)）]\s*')
+    TITLE_NUM_PREFIX = re.compile(r'^\d+[、.．]\s*')
+    
+    def __init__(self, config: ConverterConfig, existing_csvs: Optional[List[str]] = None) -> None:
         self.config = config
-        self.downloader = PDFDownloader(
-            timeout=config.timeout,
-            chunk_size=config.chunk_size
-        )
+        # 运行开始时 csv_dir 中已有CSV文件名（已排序），用于断点续传检查；
+        # 为None时每次检查都重新列目录（单独调用 process_single_file 时）
+        self.existing_csvs = existing_csvs
+        self._downloader: Optional[PDFDownloader] = None
+    
+    @property
+    def downloader(self) -> PDFDownloader:
+        """下载器（及其 Session）首次下载时才创建，只做表格提取的工作进程不持有用不到的连接池。"""
+        if self._downloader is None:
+            self._downloader = PDFDownloader(
+                timeout=self.config.timeout,
+                chunk_size=self.config.chunk_size
+            )
+        return self._downloader
+    
+    def _find_existing_csvs(self, base_name: str) -> List[str]:
+        """查找以 base_name 开头的已有CSV；有预扫描结果时二分定位，免去逐文件列目录。"""
+        if self.existing_csvs is None:
+            return [f for f in os.listdir(self.config.csv_dir)
+                    if f.startswith(base_name) and f.endswith(self.OUTPUT_SUFFIXES)]
+        names = self.existing_csvs
+        matches = []
+        for i in range(bisect_left(names, base_name), len(names)):
+            if not names[i].startswith(base_name):
+                break
+            matches.append(names[i])
+        return matches
     
     @staticmethod
     def _sanitize_filename(filename: str) -> str:
         """清理文件名中的非法字符。"""
-        return re.sub(PDFTableExtractor.INVALID_CHARS, '', filename)
+        return filename.translate(PDFTableExtractor.INVALID_CHARS_TABLE)
     
     def _download_with_retry(self, pdf_url: str, pdf_file_path: str) -> bool:
         """带重试机制的下载。"""
@@ -168,40 +309,38 @@ class PDFTableExtractor:
         return False
     
     @staticmethod
-    def _get_table_title(page, table_bbox) -> Optional[str]:
+    def _get_page_lines(page) -> Tuple[List[int], List[str]]:
+        """
+        将页面文字按行合并，返回按y坐标升序排列的 (行y坐标, 行文本)。
+        每页只计算一次，供该页所有表格查找标题，避免逐表格重复 extract_words。
+        """
+        # 按y坐标分组
+        lines: Dict[int, List[Tuple[float, str]]] = {}
+        for w in page.extract_words():
+            lines.setdefault(round(w['top']), []).append((w['x0'], w['text']))
+        
+        # 合并同一行的文字（按x坐标从左到右）
+        ys = sorted(lines)
+        texts = [''.join(w[1] for w in sorted(lines[y], key=itemgetter(0))) for y in ys]
+        return ys, texts
+    
+    @staticmethod
+    def _get_table_title(page_lines: Tuple[List[int], List[str]], table_bbox) -> Optional[str]:
         """获取表格上方的章节标题。"""
-        table_top = table_bbox[1]
+        ys, texts = page_lines
+        # 只看表格上方（y < 表格顶部 - 5）的行，二分定位边界后自下而上查找
+        boundary = bisect_left(ys, table_bbox[1] - 5)
         
-        words = page.extract_words()
-        # 按y坐标分组
-        lines = {}
-        for w in words:
-            y = round(w['top'])
-            if y not in lines:
-                lines[y] = []
-            lines[y].append((w['x0'], w['text']))
-        
-        # 合并同一行的文字
-        line_texts = {}
-        for y, words_list in lines.items():
-            words_list.sort(key=lambda x: x[0])
-            line_texts[y] = ''.join([w[1] for w in words_list])
-        
-        # 章节标题模式（以数字或括号开头）
-        title_pattern = re.compile(r'^[（(一二三四五六七八九十\d]')
-        
-        for y in sorted(line_texts.keys(), reverse=True):
-            if y >= table_top - 5:
-                continue
-            text = line_texts[y].strip()
+        for i in range(boundary - 1, -1, -1):
+            text = texts[i].strip()
             if len(text) < 4:
                 continue
             if text.startswith('□'):
                 continue
-            if title_pattern.match(text):
+            if PDFTableExtractor.TITLE_PATTERN.match(text):
                 # 清理序号
-                clean = re.sub(r'^[（(][一二三四五六七八九十]+[)）]\s*', '', text)
-                clean = re.sub(r'^\d+[、.．]\s*', '', clean)
+                clean = PDFTableExtractor.TITLE_PAREN_PREFIX.sub('', text)
+                clean = PDFTableExtractor.TITLE_NUM_PREFIX.sub('', clean)
                 return clean[:40]
         
         return None
@@ -222,6 +361,51 @@ class PDFTableExtractor:
             data_rows.append(cleaned_row)
         return header, data_rows
     
+    def _open_pdf(self, pdf_path: str):
+        """按配置的后端打开PDF；auto 时已安装 pdfplumber_rs 则优先使用，否则回退到 pdfplumber。"""
+        backend = self.config.backend
+        if backend == "auto":
+            backend = "pdfplumber_rs" if pdfplumber_rs is not None else "pdfplumber"
+        if backend == "pdfplumber_rs":
+            if pdfplumber_rs is None:
+                raise ImportError("backend='pdfplumber_rs' 需要先安装提供 pdfplumber_rs 模块的 Rust 后端（见 requirements-optional.txt）")
+            return pdfplumber_rs.open(pdf_path)
+        if backend == "pdfplumber":
+            return pdfplumber.open(pdf_path)
+        raise ValueError(f"不支持的PDF解析后端: {backend}，可选 auto/pdfplumber/pdfplumber_rs")
+
+    @staticmethod
+    def _release_page(page) -> None:
+        """
+        释放页面缓存的字符、线条和文本布局。pdfplumber 会一直保留已访问页面的解析结果直到PDF关闭，
+        数百页的年报会让每个工作进程的内存持续增长；表格已提取完毕的页面不再需要这些对象。
+        """
+        flush_cache = getattr(page, "flush_cache", None)
+        if flush_cache is not None:
+            flush_cache()
+        get_textmap = getattr(page, "get_textmap", None)
+        if hasattr(get_textmap, "cache_clear"):
+            get_textmap.cache_clear()
+    
+    @staticmethod
+    def _write_parquet(tables: List[Tuple[str, List[str], List[List[str]]]], parquet_path: str) -> None:
+        """
+        将一份报告的所有表格写入单个 Parquet（ZSTD压缩），代替每个表格一个小CSV。
+        各表格列数不同，按行存储：table_title 区分表格，row 为行号（0 为表头），cells 为该行单元格。
+        """
+        titles, row_nums, cells = [], [], []
+        for title, header, data_rows in tables:
+            for row_num, row in enumerate([header, *data_rows]):
+                titles.append(title)
+                row_nums.append(row_num)
+                cells.append(row)
+        table = pa.table({
+            "table_title": pa.array(titles, pa.string()),
+            "row": pa.array(row_nums, pa.int32()),
+            "cells": pa.array(cells, pa.list_(pa.string())),
+        })
+        pq.write_table(table, parquet_path, compression="zstd", compression_level=3)
+    
     def _extract_tables_to_csv(self, pdf_path: str, csv_dir: str, base_name: str) -> int:
         """从PDF中提取所有表格，支持跨页表格合并。
         
@@ -232,21 +416,27 @@ class PDFTableExtractor:
         all_tables = []  # [(title, header, data_rows), ...]
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
+            with self._open_pdf(pdf_path) as pdf:
                 for page_num, page in enumerate(pdf.pages, 1):
                     try:
+                        # extract_tables 内部会再跑一遍表格检测，这里检测一次后逐个提取
                         tables_obj = page.find_tables()
-                        tables_data = page.extract_tables()
+                        tables_data = [table_obj.extract() for table_obj in tables_obj]
                         
+                        page_lines = None
                         for table_obj, table in zip(tables_obj, tables_data):
                             if table and len(table) >= 1:
-                                title = self._get_table_title(page, table_obj.bbox)
+                                if page_lines is None:
+                                    page_lines = self._get_page_lines(page)
+                                title = self._get_table_title(page_lines, table_obj.bbox)
                                 header, data_rows = self._clean_table_data(table)
                                 all_tables.append((title, header, data_rows, page_num))
                                 
                     except Exception as e:
                         logging.debug(f"提取第 {page_num} 页表格失败: {e}")
                         continue
+                    finally:
+                        self._release_page(page)
         except Exception as e:
             logging.error(f"打开PDF失败: {pdf_path}, 错误: {e}")
             raise
@@ -290,8 +480,9 @@ class PDFTableExtractor:
                 title = f"表格_p{page_num}"
             merged_tables.append((title, header, data_rows))
         
-        # 保存CSV
+        # 同名表格追加序号区分
         title_counter = {}
+        named_tables = []
         for title, header, data_rows in merged_tables:
             title_clean = self._sanitize_filename(title)
             if title_clean in title_counter:
@@ -299,29 +490,42 @@ class PDFTableExtractor:
                 title_clean = f"{title_clean}_{title_counter[title_clean]}"
             else:
                 title_counter[title_clean] = 1
-            
-            df = pd.DataFrame(data_rows, columns=header)
-            csv_filename = f"{base_name}_{title_clean}.csv"
-            csv_path = os.path.join(csv_dir, csv_filename)
-            df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+            named_tables.append((title_clean, header, data_rows))
+        
+        if self.config.output_format == "parquet":
+            self._write_parquet(named_tables, os.path.join(csv_dir, f"{base_name}.parquet"))
+        else:
+            # 保存CSV
+            for title_clean, header, data_rows in named_tables:
+                csv_filename = f"{base_name}_{title_clean}.csv"
+                csv_path = os.path.join(csv_dir, csv_filename)
+                # 数据已是列表的列表，直接用 csv.writer 写出，不再构造 DataFrame；
+                # 行结束符与 pandas.to_csv 默认一致，输出内容不变
+                with open(csv_path, 'w', newline='', encoding='utf-8-sig') as f:
+                    writer = csv.writer(f, lineterminator=os.linesep)
+                    writer.writerow(header)
+                    writer.writerows(data_rows)
         
         table_count = len(merged_tables)
         if table_count > 0:
-            logging.info(f"CSV保存成功 ({table_count}个表格): {base_name}")
+            logging.info(f"{self.config.output_format.upper()}保存成功 ({table_count}个表格): {base_name}")
         else:
             logging.warning(f"未提取到任何表格: {base_name}")
         
         return table_count
     
-    def process_single_file(
+    def prepare_pdf(
         self,
         code: int,
         name: str,
         title: str,
         announcement_time: str,
         pdf_url: str
-    ) -> bool:
-        """处理单个文件的下载和表格提取。"""
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        断点检查并下载PDF，返回 (是否成功, 待提取表格的PDF路径)。
+        CSV已存在时返回 (True, None)，下载失败返回 (False, None)。
+        """
         # 生成文件名: {发布时间}_{标题}_{code}_{公司名称}
         datetime_str = str(announcement_time)[:19].replace('-', '').replace(':', '').replace(' ', '_')
         base_name = self._sanitize_filename(f"{datetime_str}_{title}_{code:06}_{name}")
@@ -329,49 +533,83 @@ class PDFTableExtractor:
         
         try:
             # 断点续传：检查是否已有CSV文件（以base_name开头的文件）
-            existing_csvs = [f for f in os.listdir(self.config.csv_dir) 
-                           if f.startswith(base_name) and f.endswith('.csv')]
+            existing_csvs = self._find_existing_csvs(base_name)
             if existing_csvs:
                 logging.info(f"CSV已存在({len(existing_csvs)}个)，跳过: {base_name}")
-                return True
+                return True, None
             
             # 断点续传：检查PDF是否已存在且有效
-            pdf_valid = (
-                os.path.exists(pdf_file_path) and 
-                os.path.getsize(pdf_file_path) > 0 and
-                PDFDownloader._verify_pdf(pdf_file_path)
-            )
-            
-            if not pdf_valid:
-                if os.path.exists(pdf_file_path):
-                    try:
-                        os.remove(pdf_file_path)
-                        logging.warning(f"删除损坏的PDF: {pdf_file_path}")
-                    except OSError:
-                        pass
+            # 只打开一次文件读取头部，不再单独 exists/getsize
+            if not PDFDownloader._is_valid_pdf(pdf_file_path):
+                try:
+                    os.remove(pdf_file_path)
+                    logging.warning(f"删除损坏的PDF: {pdf_file_path}")
+                except OSError:
+                    pass
                 
                 if not self._download_with_retry(pdf_url, pdf_file_path):
-                    return False
+                    return False, None
             else:
                 logging.info(f"PDF已存在，跳过下载: {base_name}.pdf")
             
-            # 提取表格并保存为CSV（每个表格一个文件）
-            table_count = self._extract_tables_to_csv(pdf_file_path, self.config.csv_dir, base_name)
-            return table_count > 0
+            return True, pdf_file_path
             
         except Exception as e:
             logging.error(f"处理文件失败 {code:06}_{name}: {e}")
+            return False, None
+    
+    def extract_pdf(self, pdf_file_path: str) -> bool:
+        """提取表格并保存为CSV（每个表格一个文件），文件名前缀与PDF同名。"""
+        base_name = Path(pdf_file_path).stem
+        try:
+            table_count = self._extract_tables_to_csv(pdf_file_path, self.config.csv_dir, base_name)
+            return table_count > 0
+        except Exception as e:
+            logging.error(f"处理文件失败 {base_name}: {e}")
             return False
-        finally:
-            self.downloader.close()
+    
+    def process_single_file(
+        self,
+        code: int,
+        name: str,
+        title: str,
+        announcement_time: str,
+        pdf_url: str
+    ) -> bool:
+        """处理单个文件的下载和表格提取。"""
+        ok, pdf_file_path = self.prepare_pdf(code, name, title, announcement_time, pdf_url)
+        if pdf_file_path is None:
+            return ok
+        return self.extract_pdf(pdf_file_path)
+
 
 
+# 每个工作进程持有一个提取器，处理该进程分到的所有PDF
+_worker_extractor: Optional[PDFTableExtractor] = None
 
-def _process_task(args: Tuple[ConverterConfig, int, str, str, str, str]) -> bool:
-    """多进程任务包装函数。"""
-    config, code, name, title, announcement_time, pdf_url = args
-    extractor = PDFTableExtractor(config)
-    return extractor.process_single_file(code, name, title, announcement_time, pdf_url)
+
+def _init_worker(config: ConverterConfig) -> None:
+    """进程池初始化函数：每个工作进程只创建一次 PDFTableExtractor。"""
+    global _worker_extractor
+    _worker_extractor = PDFTableExtractor(config)
+
+
+def _process_context():
+    """
+    返回进程池使用的启动方式：支持时用 forkserver，工作进程从只预导入了解析依赖的
+    精简服务进程 fork 出来，不继承主进程中的 DataFrame、任务列表和下载 Session；
+    Windows 不支持 forkserver，使用平台默认方式（spawn）。
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context()
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(["pdfplumber", "pandas", "requests"])
+    return ctx
+
+
+def _extract_task(pdf_file_path: str) -> bool:
+    """多进程任务包装函数：只做CPU密集的表格提取，下载在主进程的线程池中完成。"""
+    return _worker_extractor.extract_pdf(pdf_file_path)
 
 
 class AnnualReportProcessor:
@@ -379,6 +617,17 @@ class AnnualReportProcessor:
     
     def __init__(self, config: ConverterConfig) -> None:
         self.config = config
+        # 每个下载线程持有自己的提取器（及其 Session），线程间不共享连接
+        self._local = threading.local()
+        # 运行开始时扫描一次 csv_dir，供所有下载线程做断点续传检查
+        self._existing_csvs: Optional[List[str]] = None
+    
+    def _download_task(self, task: Tuple[int, str, str, str, str]) -> Tuple[bool, Optional[str]]:
+        """下载线程任务：断点检查并下载PDF，返回值同 PDFTableExtractor.prepare_pdf。"""
+        extractor = getattr(self._local, "extractor", None)
+        if extractor is None:
+            extractor = self._local.extractor = PDFTableExtractor(self.config, self._existing_csvs)
+        return extractor.prepare_pdf(*task)
     
     def _load_data(self) -> pd.DataFrame:
         """加载数据文件（支持Excel和CSV）。"""
@@ -418,8 +667,14 @@ class AnnualReportProcessor:
         if missing_cols:
             raise ValueError(f"数据文件缺少必需列: {missing_cols}")
         
-        df['year'] = pd.to_datetime(df['announcement_time']).dt.year
-        filtered = df[df['year'] == self.config.target_year]
+        # 爬虫输出的公告时间是 "YYYY-MM-DD HH:MM:SS" 字符串，直接截取年份，
+        # 免去逐条解析为 Timestamp；Excel 读入的日期列本身已是 datetime 类型
+        times = df['announcement_time']
+        if pd.api.types.is_datetime64_any_dtype(times):
+            years = times.dt.year
+        else:
+            years = pd.to_numeric(times.astype(str).str.slice(0, 4), errors='coerce')
+        filtered = df[years == self.config.target_year]
         logging.info(f"找到 {len(filtered)} 条 {self.config.target_year} 年的记录")
         return filtered
     
@@ -428,10 +683,15 @@ class AnnualReportProcessor:
         logging.info("="*60)
         logging.info("年报批量下载与表格提取程序启动")
         logging.info(f"目标年份: {self.config.target_year}")
-        logging.info("输出格式: CSV (结构化表格数据)")
+        logging.info(f"输出格式: {self.config.output_format.upper()} (结构化表格数据)")
         logging.info("支持断点续传：已存在的PDF和CSV文件将被跳过")
         logging.info("="*60)
         
+        if self.config.output_format not in ("csv", "parquet"):
+            raise ValueError(f"不支持的输出格式: {self.config.output_format}，可选 csv/parquet")
+        if self.config.output_format == "parquet" and pa is None:
+            raise ImportError("output_format='parquet' 需要先安装 pyarrow")
+        
         df = self._load_data()
         self._prepare_directories()
         
@@ -440,22 +700,80 @@ class AnnualReportProcessor:
             logging.warning(f"未找到 {self.config.target_year} 年的数据")
             return
         
-        tasks = [
-            (self.config, row['company_code'], row['company_name'], 
-             row['title'], row['announcement_time'], row['url'])
-            for _, row in filtered_df.iterrows()
-        ]
+        # 按列取出后逐行组合，避免 iterrows 为每行构造 Series
+        tasks = list(zip(
+            filtered_df['company_code'].tolist(),
+            filtered_df['company_name'].tolist(),
+            filtered_df['title'].tolist(),
+            filtered_df['announcement_time'].tolist(),
+            filtered_df['url'].tolist(),
+        ))
+        
+        self._existing_csvs = sorted(
+            f for f in os.listdir(self.config.csv_dir) if f.endswith(PDFTableExtractor.OUTPUT_SUFFIXES)
+        )
         
         worker_count = self.config.processes or min(cpu_count(), len(tasks))
-        logging.info(f"使用 {worker_count} 个进程处理 {len(tasks)} 个文件")
+        download_workers = self.config.download_workers or worker_count * 2
+        logging.info(f"使用 {download_workers} 个下载线程、{worker_count} 个进程处理 {len(tasks)} 个文件")
+        
+        # 下载（I/O密集）在线程池中进行，下载完成的PDF立即交给进程池提取表格，
+        # 网络等待与表格解析重叠，总耗时取决于两者中较慢的一方而非两者之和
+        # 在途下载与已下载待提取的PDF合计不超过该窗口：提取较慢时下载不会无限领先
+        window = download_workers + worker_count * 2
+        # 下载或提取完成时唤醒主线程；调度、进度条和计数都只在主线程进行
+        wake = threading.Event()
+        
+        def notify(*_) -> None:
+            wake.set()
         
-        with Pool(processes=worker_count) as pool:
-            results = list(tqdm(
-                pool.imap(_process_task, tasks),
-                total=len(tasks),
-                desc=f"{self.config.target_year}年处理进度"
-            ))
-            success_count = sum(results)
+        with ThreadPoolExecutor(max_workers=download_workers) as download_pool, \
+                _process_context().Pool(
+                    processes=worker_count, initializer=_init_worker, initargs=(self.config,)
+                ) as pool, \
+                tqdm(total=len(tasks), desc=f"{self.config.target_year}年处理进度") as progress:
+            remaining = iter(tasks)
+            downloads: set = set()
+            extractions: list = []
+            success_count = 0
+            try:
+                while True:
+                    while len(downloads) + len(extractions) < window:
+                        task = next(remaining, None)
+                        if task is None:
+                            break
+                        future = download_pool.submit(self._download_task, task)
+                        future.add_done_callback(notify)
+                        downloads.add(future)
+                    if not downloads and not extractions:
+                        break
+                    
+                    wake.wait()
+                    wake.clear()
+                    
+                    # 下载完成的PDF立即交给进程池提取；CSV已存在或下载失败的直接计数
+                    for future in [f for f in downloads if f.done()]:
+                        downloads.remove(future)
+                        ok, pdf_file_path = future.result()
+                        if pdf_file_path is None:
+                            success_count += ok
+                            progress.update(1)
+                        else:
+                            extractions.append(pool.apply_async(
+                                _extract_task, (pdf_file_path,), callback=notify, error_callback=notify
+                            ))
+                    
+                    pending = []
+                    for result in extractions:
+                        if result.ready():
+                            success_count += result.get()
+                            progress.update(1)
+                        else:
+                            pending.append(result)
+                    extractions = pending
+            finally:
+                # 正常结束、中断或出错时先取消尚未开始的下载，再由 with 终止进程池
+                download_pool.shutdown(wait=True, cancel_futures=True)
         
         logging.info("="*60)
         logging.info(f"处理完成: 成功 {success_count}/{len(tasks)}")
@@ -483,6 +801,9 @@ if __name__ == '__main__':
     MAX_RETRIES = 3  # 最大重试次数
     TIMEOUT = 15  # 请求超时（秒）
     PROCESSES = None  # 进程数（None表示自动）
+    DOWNLOAD_WORKERS = None  # 下载线程数（None表示进程数的2倍）
+    BACKEND = "auto"  # PDF解析后端（auto: 可导入 pdfplumber_rs 时优先使用）
+    OUTPUT_FORMAT = "csv"  # 表格输出格式（parquet: 每份报告一个文件，需要 pyarrow）
     
     # ==================== 执行逻辑 ====================
     
@@ -495,7 +816,10 @@ if __name__ == '__main__':
                 target_year=year,
                 max_retries=MAX_RETRIES,
                 timeout=TIMEOUT,
-                processes=PROCESSES
+                processes=PROCESSES,
+                download_workers=DOWNLOAD_WORKERS,
+                backend=BACKEND,
+                output_format=OUTPUT_FORMAT
             )
             
             processor = AnnualReportProcessor(config)
@@ -510,7 +834,10 @@ if __name__ == '__main__':
             target_year=SINGLE_YEAR,
             max_retries=MAX_RETRIES,
             timeout=TIMEOUT,
-            processes=PROCESSES
+            processes=PROCESSES,
+            download_workers=DOWNLOAD_WORKERS,
+            backend=BACKEND,
+            output_format=OUTPUT_FORMAT
         )
         
         processor = AnnualReportProcessor(config)
@@ -12,12 +12,16 @@
 """
 
 import argparse
+import atexit
 import csv
 import json
 import os
 import re
+import sqlite3
 import sys
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
@@ -37,7 +41,24 @@ import cninfo_tools
 MAX_TURNS = 8           # 最大推理轮次 (增加以允许更多搜索)
 MAX_DOC_LENGTH = 6000   # PDF 文本最大长度
 TEMP_DIR = Path("temp")
-PROGRESS_FILE = "progress.json"
+PROGRESS_DB = "progress.db"         # 进度库：progress(code, status) 表，按股票代码逐行更新
+PROGRESS_FILE = "progress.json"     # 旧版进度文件，首次运行时导入进度库
+SAVE_INTERVAL = 10      # 每处理多少只股票批量写入一次进度（结果行逐只立即写入 CSV）
+
+# PDF 文本切片关键词：合并为一个预编译正则，一次扫描找出所有关键词位置；
+# 用零宽前瞻匹配，相互重叠的关键词（如"置换股"中的"置换"与"换股"）也都能找到
+SLICE_KEYWORDS = ["置换", "比例", "换股", "合并", "预案", "方案", "终止上市", "退市", "摘牌", "决议", "通过"]
+SLICE_KEYWORD_PATTERN = re.compile("(?=" + "|".join(map(re.escape, SLICE_KEYWORDS)) + ")")
+
+# 预取：拿到公告列表后，后台先下载解析标题最可能被阅读的几份公告，隐藏在 LLM 推理时间之后
+PREFETCH_DOCS = 3
+PREFETCH_WORKERS = 4
+PREFETCH_TITLE_PATTERN = re.compile("预案|合并|终止上市|摘牌")
+
+# Prompt 中的公告列表：按标题关键词和离退市日期远近打分，只发送得分最高的若干条，
+# 减少例行公告对模型的干扰和每轮的 token 数；READ_DOC 仍可按 id 读取完整列表中的任意公告
+PROMPT_ANN_LIMIT = 20
+RANK_TITLE_PATTERN = re.compile("预案|合并|终止|摘牌|决议|变更")
 
 # ========== SKILL.md 规则客制化 Prompt ==========
 SYSTEM_PROMPT = """你是一个严谨的退市股票分析师。目标：构建 Point-in-Time (PIT) 历史数据库，用于量化回测。
@@ -130,26 +151,132 @@ class BatchAnalyzer:
         self.config_path = config_path
         self.client = LLMClient(load_config(config_path))
         self.cninfo = cninfo_tools.CNINFOClient()
-        self.progress = self._load_progress()
+        self._db = self._open_progress_db()
+        # 多线程分析时保护进度库连接与结果 CSV 的写入
+        self._lock = threading.Lock()
+        # 写入 CSV 失败待重试的结果行，及尚未写入进度库的状态（每 SAVE_INTERVAL 只股票批量写一次）
+        self._pending_results: List[Dict[str, Any]] = []
+        self._pending_progress: Dict[str, str] = {}
+        # 兜底：run() 之外的异常退出路径也尽量把已有结果和进度落盘
+        atexit.register(self._flush)
+        # 公告预取线程池（所有股票共享）
+        self._doc_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS)
         
         TEMP_DIR.mkdir(exist_ok=True)
         
-    def _load_progress(self) -> Dict[str, str]:
-        if os.path.exists(PROGRESS_FILE):
+    @staticmethod
+    def _open_progress_db() -> sqlite3.Connection:
+        """
+        打开进度库（WAL 模式）：更新只写变化的行，启动时也无需载入全部进度；
+        库为空且存在旧版 progress.json 时先导入
+        """
+        conn = sqlite3.connect(PROGRESS_DB, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS progress(code TEXT PRIMARY KEY, status TEXT)")
+        if os.path.exists(PROGRESS_FILE) and conn.execute("SELECT 1 FROM progress LIMIT 1").fetchone() is None:
             try:
                 with open(PROGRESS_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
-
-    def _save_progress(self, code: str, status: str):
-        self.progress[code] = status
-        with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.progress, f, ensure_ascii=False, indent=2)
-
-    def run(self, limit: int = None):
-        """执行批量分析"""
+                    legacy = json.load(f)
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO progress VALUES (?, ?)", legacy.items())
+                print(f"Imported {len(legacy)} entries from {PROGRESS_FILE} into {PROGRESS_DB}")
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"  Failed to import {PROGRESS_FILE}: {e}")
+        return conn
+
+    def _is_done(self, code: str) -> bool:
+        """查询股票是否已分析完成"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM progress WHERE code = ? AND status = 'DONE'", (code,)
+            ).fetchone()
+        return row is not None
+
+    def _save_progress(self, code: str, status: str, result: Optional[Dict[str, Any]] = None):
+        """
+        记录一只股票的状态：成功的结果行立即追加到 CSV（每只股票耗时数分钟、消耗多轮 LLM 调用，
+        逐只写入的开销可以忽略），进度累计满 SAVE_INTERVAL 只后批量写入进度库
+        """
+        with self._lock:
+            self._pending_progress[code] = status
+            if result:
+                self._pending_results.append(result)
+                self._append_pending_results_locked()
+            if len(self._pending_progress) >= SAVE_INTERVAL:
+                self._flush_locked()
+
+    def _flush(self):
+        """将未落盘的结果和进度写入文件"""
+        with self._lock:
+            self._flush_locked()
+
+    def _append_pending_results_locked(self) -> bool:
+        """
+        追加待写入的结果行到 CSV，返回是否已全部写入（调用方需持有 self._lock）
+        
+        写入失败（如文件被 Excel 占用）时保留待写内容，下次记录结果或落盘时重试
+        """
+        if not self._pending_results:
+            return True
+        if not cninfo_tools.append_results_to_csv(self.output_csv, self._pending_results):
+            print(f"  Failed to append {len(self._pending_results)} results to {self.output_csv}, "
+                  f"will retry on next save")
+            return False
+        self._pending_results = []
+        return True
+
+    def _flush_locked(self):
+        """
+        先追加写入失败待重试的结果行，再在一个事务内 UPSERT 进度（调用方需持有 self._lock）
+        
+        不会出现进度为 DONE 但结果未写入；中断时进度尚未提交的几只股票下次会重新分析
+        （结果行已在 CSV 中，可能重复一行，但不会丢失已付费的分析结果），
+        进度库由 sqlite 事务保证不会写到一半而损坏
+        """
+        if not self._append_pending_results_locked():
+            # 结果未写入时进度也不提交，避免出现 DONE 但结果缺失
+            return
+        if self._pending_progress:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO progress VALUES (?, ?)", self._pending_progress.items()
+                )
+            self._pending_progress = {}
+
+    def _process_stock(self, index: int, total: int, code: str, delist_date: str, name: str) -> str:
+        """分析单个股票并记录结果与进度，返回 DONE / SKIPPED / FAILED"""
+        print(f"\n[{index}/{total}] Processing {code} {name} (Delist: {delist_date})...")
+        
+        try:
+            result = self.analyze_stock(code, delist_date, name)
+            
+            if result:
+                self._save_progress(code, "DONE", result)
+                print(f"  ✅ Success: {code}")
+                return "DONE"
+            elif result is None:
+                self._save_progress(code, "SKIPPED")
+                print(f"  ⏭️ Skipped: {code}")
+                return "SKIPPED"
+            else:
+                self._save_progress(code, "FAILED")
+                print(f"  ❌ Failed: {code}")
+                return "FAILED"
+                
+        except Exception as e:
+            print(f"  ❌ Error ({code}): {e}")
+            self._save_progress(code, f"ERROR: {str(e)[:100]}")
+            return "FAILED"
+
+    def run(self, limit: int = None, workers: int = 1):
+        """
+        执行批量分析
+        
+        Args:
+            limit: 最多处理的输入行数
+            workers: 并发分析的股票数。每只股票的耗时几乎都在等待 LLM 和巨潮的网络响应，
+                多线程可同时进行多个请求；>1 时各股票的日志会交错输出
+        """
         print(f"Starting batch analysis from {self.input_csv}...")
         
         todos = []
@@ -160,10 +287,7 @@ class BatchAnalyzer:
         
         print(f"Loaded {len(todos)} stocks to process.")
         
-        success_count = 0
-        skip_count = 0
-        fail_count = 0
-        
+        pending = []
         for i, row in enumerate(todos):
             if limit and i >= limit:
                 break
@@ -179,38 +303,31 @@ class BatchAnalyzer:
                 print(f"[{i+1}] Skipping invalid row: {row}")
                 continue
                 
-            if code in self.progress and self.progress[code] == "DONE":
+            if self._is_done(code):
                 print(f"[{i+1}] Skipping {code} (Already DONE)")
                 continue
-
-            print(f"\n[{i+1}/{len(todos)}] Processing {code} {name} (Delist: {delist_date})...")
             
-            try:
-                result = self.analyze_stock(code, delist_date, name)
-                
-                if result:
-                    cninfo_tools.append_result_to_csv(self.output_csv, result)
-                    self._save_progress(code, "DONE")
-                    print(f"  ✅ Success")
-                    success_count += 1
-                elif result is None:
-                    self._save_progress(code, "SKIPPED")
-                    print(f"  ⏭️ Skipped")
-                    skip_count += 1
-                else:
-                    self._save_progress(code, "FAILED")
-                    print(f"  ❌ Failed")
-                    fail_count += 1
-                    
-            except Exception as e:
-                print(f"  ❌ Error: {e}")
-                self._save_progress(code, f"ERROR: {str(e)[:100]}")
-                fail_count += 1
+            pending.append((i + 1, len(todos), code, delist_date, name))
+        
+        # 提交即执行，按完成顺序统计结果
+        statuses = []
+        executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        try:
+            futures = [executor.submit(self._process_stock, *args) for args in pending]
+            for future in as_completed(futures):
+                statuses.append(future.result())
+        finally:
+            # 中断或异常时取消尚未开始的股票，正在分析的自然结束；关闭预取线程池，再把剩余结果和进度落盘
+            executor.shutdown(wait=True, cancel_futures=True)
+            self._doc_pool.shutdown(wait=True, cancel_futures=True)
+            self._flush()
+            self.client.close()
+            self.cninfo.close()
             
         print(f"\n========== Summary ==========")
-        print(f"Success: {success_count}")
-        print(f"Skipped: {skip_count}")
-        print(f"Failed:  {fail_count}")
+        print(f"Success: {statuses.count('DONE')}")
+        print(f"Skipped: {statuses.count('SKIPPED')}")
+        print(f"Failed:  {statuses.count('FAILED')}")
 
     def analyze_stock(self, code: str, delist_date: str, name: str = "") -> Optional[Dict[str, Any]]:
         """分析单个股票"""
@@ -240,114 +357,216 @@ class BatchAnalyzer:
         with open(cache_file, 'w', encoding='utf-8') as f:
             json.dump({"announcements": announcements}, f, ensure_ascii=False, indent=2)
 
-        # Step 2: Agent Loop
-        ann_summary = [{"id": a["id"], "date": a["date"], "title": a["title"]} for a in announcements]
-        current_state = {"code": code, "名称": name, "退市日期": delist_date}
-        last_doc_content = ""
-        last_action_result = ""
+        # 后台预取最可能被阅读的公告，READ_DOC 时直接取结果
+        doc_futures: Dict[str, Future] = {}
+        doc_texts: Dict[str, Optional[str]] = {}
+        for a in announcements:
+            if len(doc_futures) >= PREFETCH_DOCS:
+                break
+            if a.get("url") and PREFETCH_TITLE_PATTERN.search(a["title"]):
+                doc_futures[str(a["id"])] = self._doc_pool.submit(self._load_doc_text, code, a)
+
+        try:
+            # Step 2: Agent Loop
+            ann_summary = [{"id": a["id"], "date": a["date"], "title": a["title"]} for a in announcements]
+            # 已有公告 id，SEARCH_MORE 去重时按集合查找
+            seen_ids = {a["id"] for a in announcements}
+            current_state = {"code": code, "名称": name, "退市日期": delist_date}
+            last_doc_content = ""
+            last_action_result = ""
+            # 公告列表的序列化结果：只在 SEARCH_MORE 扩充列表后重新生成
+            ann_block = None
         
-        for turn in range(MAX_TURNS):
-            print(f"  -> Turn {turn + 1}/{MAX_TURNS}")
+            for turn in range(MAX_TURNS):
+                print(f"  -> Turn {turn + 1}/{MAX_TURNS}")
             
-            # 构造 User Prompt
-            user_prompt = self._build_user_prompt(code, delist_date, ann_summary, current_state, last_doc_content, last_action_result)
+                # 构造 User Prompt
+                if ann_block is None:
+                    ann_block = self._format_ann_summary(ann_summary, delist_date)
+                user_prompt = self._build_user_prompt(code, delist_date, ann_block, current_state, last_doc_content, last_action_result)
             
-            # 调用 LLM
-            try:
-                response = self.client.chat([
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt}
-                ])
-            except Exception as e:
-                print(f"    LLM Error: {e}")
-                return False
+                # 调用 LLM
+                try:
+                    response = self.client.chat([
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": user_prompt}
+                    ])
+                except Exception as e:
+                    print(f"    LLM Error: {e}")
+                    return False
             
-            # 解析响应
-            thought = response.get("thought", "")
-            action = response.get("action", "")
-            params = response.get("action_params", {})
+                # 解析响应
+                thought = response.get("thought", "")
+                action = response.get("action", "")
+                params = response.get("action_params", {})
             
-            print(f"    Thought: {thought[:80]}...")
-            print(f"    Action: {action}")
+                print(f"    Thought: {thought[:80]}...")
+                print(f"    Action: {action}")
             
-            # 从响应中获取 updated_state 并更新 current_state
-            updated_state = response.get("updated_state", {})
-            if updated_state:
-                for key, value in updated_state.items():
-                    if value is not None and value != "null" and value != "":
-                        current_state[key] = value
+                # 从响应中获取 updated_state 并更新 current_state
+                updated_state = response.get("updated_state", {})
+                if updated_state:
+                    for key, value in updated_state.items():
+                        if value is not None and value != "null" and value != "":
+                            current_state[key] = value
             
-            # 清除上一轮的文档内容 (Memory Compression)
-            last_doc_content = ""
-            last_action_result = ""
+                # 清除上一轮的文档内容 (Memory Compression)
+                last_doc_content = ""
+                last_action_result = ""
             
-            # 执行 Action
-            if action == "SUBMIT":
-                # 使用累积的 current_state
-                submit_data = {**current_state}
-                submit_data["code"] = code  # 确保 code 正确
+                # 执行 Action
+                if action == "SUBMIT":
+                    # 使用累积的 current_state
+                    submit_data = {**current_state}
+                    submit_data["code"] = code  # 确保 code 正确
                 
-                # 校验
-                validation = cninfo_tools.validate_result(submit_data)
-                if validation["valid"]:
-                    return submit_data
-                else:
-                    # Validation-Correction Loop: 回填错误
-                    errors = validation.get("errors", [])
-                    error_msg = "; ".join([e.get("message", str(e)) for e in errors])
-                    print(f"    Validation Failed: {error_msg[:100]}")
-                    last_action_result = f"VALIDATION_ERROR: {error_msg}"
-                    # 继续循环让 LLM 修正
-                    continue
+                    # 校验
+                    validation = cninfo_tools.validate_result(submit_data)
+                    if validation["valid"]:
+                        return submit_data
+                    else:
+                        # Validation-Correction Loop: 回填错误
+                        errors = validation.get("errors", [])
+                        error_msg = "; ".join([e.get("message", str(e)) for e in errors])
+                        print(f"    Validation Failed: {error_msg[:100]}")
+                        last_action_result = f"VALIDATION_ERROR: {error_msg}"
+                        # 继续循环让 LLM 修正
+                        continue
                     
-            elif action == "SKIP":
-                reason = params.get("reason", "Unknown")
-                print(f"    Skip Reason: {reason}")
-                return None
+                elif action == "SKIP":
+                    reason = params.get("reason", "Unknown")
+                    print(f"    Skip Reason: {reason}")
+                    return None
                     
-            elif action == "READ_DOC":
-                ann_id = str(params.get("id", ""))
-                target = next((a for a in announcements if str(a["id"]) == ann_id), None)
+                elif action == "READ_DOC":
+                    ann_id = str(params.get("id", ""))
+                    target = next((a for a in announcements if str(a["id"]) == ann_id), None)
                 
-                if target and target.get("url"):
-                    pdf_path = TEMP_DIR / f"{code}_{ann_id}.pdf"
-                    print(f"    Downloading: {target['title'][:40]}...")
+                    if target and target.get("url"):
+                        print(f"    Reading: {target['title'][:40]}...")
+                        text = self._read_doc(doc_futures, doc_texts, code, target)
                     
-                    if self.cninfo.download_pdf(target["url"], str(pdf_path)):
-                        text = cninfo_tools.extract_text_from_pdf(str(pdf_path), max_pages=5)
-                        # 关键词切片
-                        sliced = self._slice_text_by_keywords(text)
-                        last_doc_content = f"--- {target['title']} ---\n{sliced}"
-                        current_state["来源公告"] = target["title"]
-                        current_state["公告URL"] = target["url"]
+                        if text is not None:
+                            # 关键词切片
+                            sliced = self._slice_text_by_keywords(text)
+                            last_doc_content = f"--- {target['title']} ---\n{sliced}"
+                            current_state["来源公告"] = target["title"]
+                            current_state["公告URL"] = target["url"]
+                        else:
+                            last_action_result = "ERROR: PDF download failed."
                     else:
-                        last_action_result = "ERROR: PDF download failed."
-                else:
-                    last_action_result = f"ERROR: Announcement ID '{ann_id}' not found."
+                        last_action_result = f"ERROR: Announcement ID '{ann_id}' not found."
                         
-            elif action == "SEARCH_MORE":
-                keyword = params.get("keyword", "")
-                if keyword:
-                    print(f"    Searching: {keyword}")
-                    more = self.cninfo.list_announcements(code, keyword=keyword, limit=20, date_range=date_range)
-                    new_anns = [a for a in more if not any(e["id"] == a["id"] for e in announcements)]
-                    announcements.extend(new_anns)
-                    ann_summary.extend([{"id": a["id"], "date": a["date"], "title": a["title"]} for a in new_anns])
-                    last_action_result = f"SEARCH_RESULT: Found {len(new_anns)} new announcements."
+                elif action == "SEARCH_MORE":
+                    keyword = params.get("keyword", "")
+                    if keyword:
+                        print(f"    Searching: {keyword}")
+                        more = self.cninfo.list_announcements(code, keyword=keyword, limit=20, date_range=date_range)
+                        new_anns = [a for a in more if a["id"] not in seen_ids]
+                        seen_ids.update(a["id"] for a in new_anns)
+                        announcements.extend(new_anns)
+                        ann_summary.extend([{"id": a["id"], "date": a["date"], "title": a["title"]} for a in new_anns])
+                        if new_anns:
+                            ann_block = None
+                        # 新结果直接附在本轮结果中，即使排名未进入公告列表也能按 id 阅读
+                        last_action_result = f"SEARCH_RESULT: Found {len(new_anns)} new announcements."
+                        if new_anns:
+                            last_action_result += "\n" + json.dumps(
+                                [{"id": a["id"], "date": a["date"], "title": a["title"]} for a in new_anns],
+                                ensure_ascii=False, indent=2
+                            )
+                    else:
+                        last_action_result = "ERROR: Missing keyword."
                 else:
-                    last_action_result = "ERROR: Missing keyword."
-            else:
-                last_action_result = f"ERROR: Unknown action '{action}'."
+                    last_action_result = f"ERROR: Unknown action '{action}'."
         
-        print(f"  -> Max turns reached without valid result.")
-        return False
-
-    def _build_user_prompt(self, code, delist_date, ann_summary, state, doc_content, last_result):
-        """构建 User Prompt"""
+            print(f"  -> Max turns reached without valid result.")
+            return False
+        finally:
+            # 未被阅读的预取任务：尚未开始的直接取消，不再占用下载线程
+            for future in doc_futures.values():
+                future.cancel()
+
+    def _load_doc_text(self, code: str, target: Dict[str, Any]) -> Optional[str]:
+        """
+        下载公告 PDF 并提取前 5 页文本，下载失败返回 None
+        
+        提取结果另存为同名 .txt，重新运行（断点续传、重试失败股票）时直接读取，不再下载和解析 PDF
+        """
+        pdf_path = TEMP_DIR / f"{code}_{target['id']}.pdf"
+        txt_path = pdf_path.with_suffix(".txt")
+        try:
+            return txt_path.read_text(encoding='utf-8')
+        except OSError:
+            pass
+        
+        if not self.cninfo.download_pdf(target["url"], str(pdf_path)):
+            return None
+        text = cninfo_tools.extract_text_from_pdf(str(pdf_path), max_pages=5)
+        # 提取失败时返回空串，不缓存，下次仍重新解析
+        if text:
+            tmp_path = txt_path.with_suffix(".tmp")
+            tmp_path.write_text(text, encoding='utf-8')
+            os.replace(tmp_path, txt_path)
+        return text
+
+    def _read_doc(
+        self,
+        doc_futures: Dict[str, Future],
+        doc_texts: Dict[str, Optional[str]],
+        code: str,
+        target: Dict[str, Any]
+    ) -> Optional[str]:
+        """读取公告文本：已预取的取预取结果，否则当场下载解析；同一股票内重复阅读直接复用"""
+        ann_id = str(target["id"])
+        if ann_id not in doc_texts:
+            future = doc_futures.pop(ann_id, None)
+            doc_texts[ann_id] = future.result() if future else self._load_doc_text(code, target)
+        return doc_texts[ann_id]
+
+    @staticmethod
+    def _rank_announcements(ann_summary, delist_date):
+        """
+        按相关性挑选发送给 LLM 的公告：标题命中关键词记 3 分，另加 1/(距退市日期天数+1)，
+        取得分最高的 PROMPT_ANN_LIMIT 条，按原顺序返回
+        """
+        if len(ann_summary) <= PROMPT_ANN_LIMIT:
+            return ann_summary
+        delist_dt = datetime.strptime(delist_date, "%Y-%m-%d")
+
+        def score(ann):
+            value = 3 if RANK_TITLE_PATTERN.search(ann["title"]) else 0
+            try:
+                days = abs((delist_dt - datetime.strptime(ann["date"], "%Y-%m-%d")).days)
+            except ValueError:
+                return value
+            return value + 1 / (days + 1)
+
+        top = sorted(range(len(ann_summary)), key=lambda i: score(ann_summary[i]), reverse=True)
+        return [ann_summary[i] for i in sorted(top[:PROMPT_ANN_LIMIT])]
+
+    @classmethod
+    def _format_ann_summary(cls, ann_summary, delist_date):
+        """序列化按相关性筛选后的公告列表，列表不变时各轮复用同一字符串"""
+        ranked = cls._rank_announcements(ann_summary, delist_date)
+        omitted = len(ann_summary) - len(ranked)
+        return f"""{json.dumps(ranked, ensure_ascii=False, indent=2)}
+{f"... 另有 {omitted} 条相关性较低的公告省略（可用 SEARCH_MORE 按关键词查找）" if omitted else ""}"""
+
+    def _build_user_prompt(self, code, delist_date, ann_block, state, doc_content, last_result):
+        """
+        构建 User Prompt
+        
+        各轮不变的任务信息和公告列表放在最前面，每轮变化的 state / 上一步结果 / 文档内容放在后面，
+        使 system + 公告列表在多轮之间保持相同前缀，支持前缀缓存的服务端（DeepSeek、vLLM 等）可直接命中缓存
+        """
         return f"""# 当前任务
 股票代码: {code}
 退市日期 (参考): {delist_date}
 
+# 公告列表 (ID - Date - Title)
+{ann_block}
+
 # 已提取信息 (State)
 {json.dumps(state, ensure_ascii=False, indent=2)}
 
@@ -357,31 +576,21 @@ class BatchAnalyzer:
 # 当前文档内容
 {doc_content if doc_content else "(无 - 请选择要阅读的公告)"}
 
-# 公告列表 (ID - Date - Title)
-{json.dumps(ann_summary[:30], ensure_ascii=False, indent=2)}
-{"... 更多公告省略" if len(ann_summary) > 30 else ""}
-
 请分析并决定下一步 action。"""
 
     def _slice_text_by_keywords(self, text: str, context_size: int = 500) -> str:
         """根据关键词切片文本，只保留相关段落"""
-        keywords = ["置换", "比例", "换股", "合并", "预案", "方案", "终止上市", "退市", "摘牌", "决议", "通过"]
-        
         if len(text) <= MAX_DOC_LENGTH:
             return text
             
-        # 找到所有关键词位置
-        positions = []
-        for kw in keywords:
-            for match in re.finditer(kw, text):
-                positions.append(match.start())
+        # 找到所有关键词位置：单次扫描按出现顺序产出，已严格递增且不重复，无需再排序去重
+        positions = [match.start() for match in SLICE_KEYWORD_PATTERN.finditer(text)]
         
         if not positions:
             # 没找到关键词，返回开头部分
             return text[:MAX_DOC_LENGTH]
         
         # 合并重叠的切片
-        positions = sorted(set(positions))
         slices = []
         current_start = None
         current_end = None
@@ -411,8 +620,9 @@ if __name__ == "__main__":
     parser.add_argument("--output", "-o", required=True, help="Output CSV")
     parser.add_argument("--config", "-c", help="Config file path")
     parser.add_argument("--limit", "-l", type=int, help="Limit number of stocks to process")
+    parser.add_argument("--workers", "-w", type=int, default=1, help="Number of stocks analyzed concurrently")
     
     args = parser.parse_args()
     
     analyzer = BatchAnalyzer(args.input, args.output, args.config)
-    analyzer.run(args.limit)
+    analyzer.run(args.limit, args.workers)
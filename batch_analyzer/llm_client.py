@@ -8,15 +8,27 @@ LLM API 客户端
 
 import json
 import os
+import random
 import re
 import sys
+import threading
 import time
 import requests
+from requests.adapters import HTTPAdapter
 from typing import List, Dict, Any, Optional
 
 class LLMClient:
     """LLM API 客户端，兼容 OpenAI 格式"""
     
+    # 连接池大小：批量分析多线程并发时每个线程都能复用一条长连接
+    POOL_MAXSIZE = 32
+    
+    # repair_json 使用的正则，预编译避免每次响应都查正则缓存
+    THINK_PATTERN = re.compile(r'<think>[\s\S]*?</think>')
+    JSON_BLOCK_PATTERN = re.compile(r"```json\s*([\s\S]*?)\s*```")
+    CODE_BLOCK_PATTERN = re.compile(r"```\s*([\s\S]*?)\s*```")
+    BRACE_PATTERN = re.compile(r"\{[\s\S]*\}")
+    
     def __init__(self, config: Dict[str, Any] = None, auto_select_model: bool = True):
         """
         初始化 LLM 客户端
@@ -35,9 +47,21 @@ class LLMClient:
         # 移除 base_url 结尾的斜杠
         if self.base_url.endswith("/"):
             self.base_url = self.base_url[:-1]
+        
+        # 复用同一个 Session：每轮对话不再重新建立 TCP/TLS 连接，公共请求头只设置一次
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.POOL_MAXSIZE, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
             
         # 可用模型列表 (用于故障切换)
         self.available_models: List[str] = []
+        # 批量分析的多个线程共享同一个客户端（及其连接池），切换当前模型时加锁
+        self._model_lock = threading.Lock()
         
         if auto_select_model:
             self._init_available_models()
@@ -58,13 +82,9 @@ class LLMClient:
 
     def list_models(self) -> List[Dict[str, Any]]:
         """获取可用模型列表"""
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
         url = f"{self.base_url}/models"
         
-        response = requests.get(url, headers=headers, timeout=10)
+        response = self.session.get(url, timeout=10)
         response.raise_for_status()
         result = response.json()
         return result.get("data", [])
@@ -80,20 +100,20 @@ class LLMClient:
             修复后的 JSON 字符串
         """
         # 移除模型的思考标签 (如 MiniMax 的 <think>...</think>)
-        json_str = re.sub(r'<think>[\s\S]*?</think>', '', json_str)
+        json_str = self.THINK_PATTERN.sub('', json_str)
         
         # 移除 Markdown 代码块包裹
         if "```json" in json_str:
-            match = re.search(r"```json\s*([\s\S]*?)\s*```", json_str)
+            match = self.JSON_BLOCK_PATTERN.search(json_str)
             if match:
                 json_str = match.group(1)
         elif "```" in json_str:
-            match = re.search(r"```\s*([\s\S]*?)\s*```", json_str)
+            match = self.CODE_BLOCK_PATTERN.search(json_str)
             if match:
                 json_str = match.group(1)
         
         # 尝试提取第一个 { ... } 块
-        match = re.search(r"\{[\s\S]*\}", json_str)
+        match = self.BRACE_PATTERN.search(json_str)
         if match:
             json_str = match.group(0)
             
@@ -118,11 +138,6 @@ class LLMClient:
         Returns:
             API 响应的 content (解析后的 JSON 或 字符串)
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         url = f"{self.base_url}/chat/completions"
         
         # 构建要尝试的模型列表：当前模型优先，然后是其他可用模型
@@ -146,7 +161,7 @@ class LLMClient:
             
             for attempt in range(max_retries):
                 try:
-                    response = requests.post(url, headers=headers, json=payload, timeout=120)
+                    response = self.session.post(url, json=payload, timeout=120)
                     response.raise_for_status()
                     
                     result = response.json()
@@ -154,8 +169,10 @@ class LLMClient:
                     
                     # 调用成功，更新当前模型
                     if model != self.model:
-                        print(f"Switched to model: {model}")
-                        self.model = model
+                        with self._model_lock:
+                            if model != self.model:
+                                print(f"Switched to model: {model}")
+                                self.model = model
                     
                     if json_mode:
                         try:
@@ -170,8 +187,13 @@ class LLMClient:
                 except requests.exceptions.RequestException as e:
                     print(f"Model '{model}' request failed (attempt {attempt+1}/{max_retries}): {e}", file=sys.stderr)
                     last_error = e
+                    # 4xx（429 限流除外）如密钥无效、模型不存在，重试也不会成功，直接换下一个模型
+                    status = e.response.status_code if e.response is not None else None
+                    if status is not None and 400 <= status < 500 and status != 429:
+                        break
                     if attempt < max_retries - 1:
-                        time.sleep(2 ** attempt)  # 指数退避
+                        # 指数退避，加随机抖动避免多个分析线程同时重试
+                        time.sleep(2 ** attempt + random.random() * 0.5)
                     # 如果所有重试都失败了，尝试下一个模型
                     
                 except json.JSONDecodeError as e:
@@ -186,6 +208,16 @@ class LLMClient:
         # 所有模型都失败了
         raise last_error or Exception("All models failed")
 
+    def close(self) -> None:
+        """关闭 Session 释放连接"""
+        self.session.close()
+
+    def __enter__(self) -> "LLMClient":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
     def test_connection(self) -> bool:
         """测试 API 连接"""
         try:
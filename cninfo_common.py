@@ -0,0 +1,867 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+'''
+@Project ：PycharmProjects
+@File    ：巨潮资讯公告爬虫公共组件
+@Date    ：2025/12/16
+@Description: 定期报告爬虫与复权公告爬虫共用的配置、API客户端、日期范围生成和公告解析/写入逻辑
+'''
+
+from __future__ import annotations
+
+import calendar
+import csv
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
+from typing import List, Optional, Dict, Any, Iterator, Tuple, TextIO
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    import orjson  # 可选依赖：解析速度明显快于标准库 json
+except ImportError:
+    orjson = None
+
+try:
+    import chinese_calendar  # 可选依赖：法定节假日与调休日历，缺失时只识别周末
+except ImportError:
+    chinese_calendar = None
+
+# Asia/Shanghai 相对UTC的固定偏移（秒）
+SHANGHAI_UTC_OFFSET = 8 * 3600
+
+
+@dataclass(frozen=True)
+class CrawlerConfig:
+    """爬虫配置类（两个爬虫共用的字段，各脚本按需继承扩展）。"""
+    start_date: str  # 开始日期 YYYY-MM-DD
+    end_date: str  # 结束日期 YYYY-MM-DD
+    exclude_keywords: List[str]  # 排除关键词列表
+    category: str = "category_ndbg_szsh"  # 报告类型
+    trade: str = ""  # 行业过滤
+    plate: str = "sz;sh"  # 板块控制（不含北交所bj）
+    max_retries: int = 5  # 最大重试次数
+    retry_delay: int = 5  # 重试退避基数（秒），实际延迟按指数增长并随机抖动
+    timeout: int = 15  # 请求超时（秒）
+    output_dir: str = "."  # 输出目录
+    save_interval: int = 500  # 增量保存间隔（条数，每累计这么多条落盘一次并更新进度）
+    page_delay: float = 0.3  # 同一线程相邻请求的最小间隔（秒），请求耗时计入间隔
+    max_qps: float = 10.0  # 全局每秒请求数上限（所有线程共享，0 表示不限）
+    concurrency: int = 4  # 并发爬取的日期数（1 表示串行）
+    page_workers: int = 4  # 单日期内并发拉取分页的线程数（全局共享，1 表示串行）
+    date_granularity: str = "month"  # 查询窗口粒度：day 按天 / month 按月（超限时自动二分）
+    merge_non_trading_days: bool = False  # 按天粒度时，将周末/节假日并入前一交易日的查询窗口以减少请求
+    verbose: bool = False  # 是否在终端输出逐页进度（并发时建议关闭）
+
+
+class RateLimiter:
+    """
+    线程安全的令牌桶限速器：所有线程共享，全局限制每秒请求数。
+    令牌按 rate 匀速补充，最多积攒 burst 个；不足时预支令牌并在锁外等待，
+    并发线程按到达顺序依次排开，不会同时醒来挤占同一时刻。
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class CNINFOClient:
+    """巨潮资讯API客户端。"""
+
+    BASE_URL = "http://www.cninfo.com.cn/new/hisAnnouncement/query"
+    PAGE_SIZE = 30
+    # 重试退避上限（秒）
+    RETRY_MAX_DELAY = 60
+    # verbose 模式下逐页进度的最小输出间隔（秒）
+    PROGRESS_INTERVAL = 0.5
+
+    HEADERS = {
+        "Accept": "*/*",
+        # urllib3 可解码的压缩格式：安装 brotli 后自动包含 br，体积比 gzip 更小
+        "Accept-Encoding": ACCEPT_ENCODING,
+        "Accept-Language": "zh-CN,zh;q=0.9",
+        "Connection": "keep-alive",
+        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+        "Host": "www.cninfo.com.cn",
+        "Origin": "http://www.cninfo.com.cn",
+        "Referer": "http://www.cninfo.com.cn/new/commonUrl/pageOfSearch/index",
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+        "X-Requested-With": "XMLHttpRequest"
+    }
+
+    def __init__(self, config: CrawlerConfig) -> None:
+        self.config = config
+        self.session = requests.Session()
+        self.session.headers.update(self.HEADERS)
+        # 连接池按并发线程数（日期线程 + 分页线程）设定，保证每个线程都能复用长连接，
+        # 避免默认的10个连接不够用时被丢弃重建
+        # 重试统一由 fetch_page 负责（带抖动的指数退避），适配器层不再叠加重试
+        pool_size = max(1, config.concurrency) + max(1, config.page_workers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # 全局限速：所有日期线程和分页线程共享同一令牌桶（max_qps<=0 表示不限速）
+        self._rate_limiter: Optional[RateLimiter] = (
+            RateLimiter(config.max_qps, burst=max(1, int(config.max_qps))) if config.max_qps > 0 else None
+        )
+        # 分页预取线程池：所有日期共享，page_workers 即分页请求的全局并发上限
+        # 每个线程记录自己上一次请求的发起时间，用于 _pace 限速
+        self._thread_state = threading.local()
+        self._page_executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=config.page_workers) if config.page_workers > 1 else None
+        )
+        # 每个日期最多提前预取的分页数，随遍历推进补充，避免一次性排入整月的全部分页
+        self._prefetch_window = 2 * max(1, config.page_workers)
+        # 上一次输出逐页进度的时间，多线程共享，仅用于节流终端输出
+        self._last_print = 0.0
+        # 每页请求中不变的参数只构建并编码一次，分页时仅拼接页码、日期和板块
+        self._base_body: bytes = urlencode({
+            "pageSize": self.PAGE_SIZE,
+            "column": "szse",
+            "tabName": "fulltext",
+            "searchkey": "",
+            "secid": "",
+            "category": config.category,
+            "trade": config.trade,
+            "sortName": "code",
+            "sortType": "asc",
+            "isHLtitle": "false"
+        }).encode("ascii")
+
+    def _build_request_data(self, page_num: int, date_range: str, plate: Optional[str] = None) -> bytes:
+        """拼接表单请求体：只编码变化的字段，其余直接复用预编码的字节串。"""
+        variable = urlencode({
+            "pageNum": page_num,
+            "plate": plate if plate else self.config.plate,
+            "seDate": date_range
+        })
+        return variable.encode("ascii") + b"&" + self._base_body
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """
+        全抖动指数退避：在 [0, min(上限, retry_delay * 2^(attempt-1))] 内随机取值，
+        避免多个并发线程在服务端抖动后同时重试。
+        """
+        cap = min(self.RETRY_MAX_DELAY, self.config.retry_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+    def _pace(self) -> None:
+        """
+        按 page_delay 控制同一线程的请求间隔：上次请求本身的耗时计入间隔，
+        服务端响应慢时不再额外等待，响应快时补足到 page_delay。
+        """
+        last = getattr(self._thread_state, "last_request_at", None)
+        if last is None:
+            return
+        remaining = self.config.page_delay - (time.monotonic() - last)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def warm_up(self) -> None:
+        """
+        并发抓取前先发一个 HEAD 请求，提前完成DNS解析并在连接池中放入一条长连接，
+        避免首批并发请求同时卡在建连上。失败不影响后续抓取，仅记录调试日志。
+        """
+        try:
+            self.session.head(self.BASE_URL, timeout=self.config.timeout, allow_redirects=False)
+        except requests.exceptions.RequestException as e:
+            logging.debug(f"连接预热失败（忽略）: {e}")
+
+    def close(self) -> None:
+        """关闭分页预取线程池（取消尚未开始的预取）和 Session 连接池。"""
+        if self._page_executor is not None:
+            self._page_executor.shutdown(wait=True, cancel_futures=True)
+        self.session.close()
+
+    def fetch_page(self, page_num: int, date_range: str, plate: Optional[str] = None) -> Dict[str, Any]:
+        """获取单页数据。失败时抛出异常。"""
+        data = self._build_request_data(page_num, date_range, plate)
+        last_error: Optional[Exception] = None
+
+        for attempt in range(1, self.config.max_retries + 1):
+            try:
+                if self._rate_limiter is not None:
+                    self._rate_limiter.acquire()
+                self._thread_state.last_request_at = time.monotonic()
+                response = self.session.post(
+                    self.BASE_URL, data=data, timeout=self.config.timeout
+                )
+                response.raise_for_status()
+                
+                # 显式处理JSON解析，区分网络错误和数据格式错误
+                try:
+                    result = orjson.loads(response.content) if orjson else response.json()
+                except ValueError as json_err:
+                    raise RuntimeError(
+                        f"JSON解析失败: {json_err}。响应内容前200字节: "
+                        f"{response.content[:200].decode('utf-8', errors='replace')}"
+                    ) from json_err
+                
+                # 校验响应结构完整性
+                if not isinstance(result, dict):
+                    raise RuntimeError(f"API响应格式异常，期望dict，实际: {type(result).__name__}")
+                
+                return result
+                
+            except requests.exceptions.RequestException as e:
+                last_error = e
+                logging.warning(f"网络请求失败 (尝试 {attempt}/{self.config.max_retries}): {e}")
+                if attempt < self.config.max_retries:
+                    time.sleep(self._backoff_delay(attempt))
+            except RuntimeError:
+                # JSON解析或响应格式错误，不重试，直接抛出
+                raise
+
+        raise RuntimeError(
+            f"获取数据失败（已重试{self.config.max_retries}次）: {date_range} 第{page_num}页。最后错误: {last_error}"
+        )
+
+    # API单次查询最大返回条数限制
+    API_MAX_RESULTS = 3000
+    # 收敛检测：连续无新增的次数阈值
+    CONVERGENCE_THRESHOLD = 3
+    # 最大尝试次数（防止无限循环）
+    MAX_MERGE_ATTEMPTS = 20
+
+    def _fetch_single_pass(
+        self, date_range: str, plate: str, data_by_id: Dict[str, Dict[str, Any]],
+        check_split: bool = False, expected_total: int = 0
+    ) -> int:
+        """
+        单次遍历所有页面，收集数据并去重合并。
+        
+        Args:
+            date_range: 日期范围
+            plate: 板块
+            data_by_id: ID到数据的映射，兼作已收集ID的去重集合（会被更新）
+            check_split: 是否检查需要拆分查询（拆分日期窗口或分板块）
+            expected_total: 上一遍遍历得到的总数，用于提前预取分页（0 表示未知）
+        
+        Returns:
+            本次遍历中遇到的最大 totalAnnouncement
+            返回 -1 表示需要拆分查询
+        """
+        # 首页拿到 totalAnnouncement 后并发预取后续分页，仍按页码顺序处理
+        prefetched: Dict[int, Future] = {}
+
+        try:
+            # 已知上一遍的总数时，第2页起与首页同时发出，每遍再省一次往返
+            self._prefetch_pages(prefetched, expected_total, 1, date_range, plate)
+            return self._walk_pages(
+                date_range, plate, data_by_id, check_split, prefetched
+            )
+        finally:
+            # 提前终止（全页重复/hasMore=False/异常）时取消未开始的预取
+            for future in prefetched.values():
+                future.cancel()
+
+    def _prefetch_pages(
+        self, prefetched: Dict[int, Future], total: int, current_page: int, date_range: str, plate: str
+    ) -> None:
+        """
+        将当前页之后、不超过 totalAnnouncement 末页的至多 _prefetch_window 页提交到分页线程池
+        （已提交的跳过）；_walk_pages 每处理一页调用一次，滑动补充预取窗口。
+        """
+        if self._page_executor is None or total <= 0:
+            return
+        last_page = min(-(-total // self.PAGE_SIZE), current_page + self._prefetch_window)
+        for p in range(current_page + 1, last_page + 1):
+            if p not in prefetched:
+                prefetched[p] = self._page_executor.submit(self.fetch_page, p, date_range, plate)
+
+    def _walk_pages(
+        self, date_range: str, plate: str, data_by_id: Dict[str, Dict[str, Any]],
+        check_split: bool, prefetched: Dict[int, Future]
+    ) -> int:
+        """按页码顺序遍历分页，供 _fetch_single_pass 调用。"""
+        page_num = 1
+        max_total = 0
+        local_seen_this_pass: set = set()  # 本次遍历中已见的ID，用于检测全页重复
+
+        while True:
+            future = prefetched.pop(page_num, None)
+            if future is not None:
+                page_data = future.result()
+            else:
+                page_data = self.fetch_page(page_num, date_range, plate)
+            
+            # 获取并更新 max_total
+            total = page_data.get("totalAnnouncement", 0)
+            if isinstance(total, int) and total > max_total:
+                max_total = total
+
+            if page_num == 1:
+                if "totalAnnouncement" not in page_data:
+                    raise RuntimeError(
+                        f"API响应缺少totalAnnouncement字段: {date_range}。响应keys: {list(page_data.keys())}"
+                    )
+                if not isinstance(total, int):
+                    raise RuntimeError(
+                        f"totalAnnouncement类型异常，期望int，实际: {type(total).__name__}"
+                    )
+                if total == 0:
+                    return 0
+                # 首页检查是否需要分板块查询
+                if check_split and total > self.API_MAX_RESULTS:
+                    logging.info(
+                        f"日期 {date_range} 数据量({total})超过API限制({self.API_MAX_RESULTS})，启用拆分查询"
+                    )
+                    return -1  # 特殊标记：需要拆分查询
+
+            self._prefetch_pages(prefetched, max_total, page_num, date_range, plate)
+
+            if "announcements" not in page_data:
+                raise RuntimeError(
+                    f"API响应缺少announcements字段: {date_range} 第{page_num}页"
+                )
+            
+            announcements = page_data["announcements"]
+            
+            # announcements为None或空列表表示无更多数据
+            if announcements is None:
+                break
+            if not isinstance(announcements, list):
+                raise RuntimeError(
+                    f"announcements类型异常，期望list，实际: {type(announcements).__name__}"
+                )
+            if len(announcements) == 0:
+                break
+
+            # 收集本页ID，同时统计本次遍历中首次出现的ID数，省去单独的子集比较
+            page_has_ids = False
+            new_this_page = 0
+            for item in announcements:
+                ann_id = item.get("announcementId")
+                if ann_id is not None:
+                    page_has_ids = True
+                    if ann_id not in local_seen_this_pass:
+                        local_seen_this_pass.add(ann_id)
+                        new_this_page += 1
+                        # 合并新数据（本次遍历已见的ID必然已在 data_by_id 中）
+                        if ann_id not in data_by_id:
+                            data_by_id[ann_id] = item
+
+            # 全页重复检测（本次遍历内）：防止API无限循环
+            if page_has_ids and new_this_page == 0:
+                logging.debug("%s 第%d页全部重复，终止本次遍历", date_range, page_num)
+                break
+            
+            # 逐页进度仅在 verbose 下输出，且按 PROGRESS_INTERVAL 节流：
+            # 每页强制 flush 代价不小，并发时多线程输出也会互相覆盖
+            if self.config.verbose and time.monotonic() - self._last_print >= self.PROGRESS_INTERVAL:
+                self._last_print = time.monotonic()
+                print(f"\r日期 {date_range} (plate={plate}): 第{page_num}页, 本次累计 {len(local_seen_this_pass)}, 总唯一 {len(data_by_id)}/{max_total}", end='', flush=True)
+
+            if "hasMore" not in page_data:
+                raise RuntimeError(
+                    f"API响应缺少hasMore字段: {date_range} 第{page_num}页"
+                )
+            
+            if not page_data["hasMore"]:
+                break
+
+            page_num += 1
+            # 预取过的分页无需再限速；超出 totalAnnouncement 的页仍串行拉取
+            if page_num not in prefetched:
+                self._pace()
+
+        return max_total
+
+    def _fetch_with_retry(self, date_range: str, plate: str, check_split: bool = False) -> List[Dict[str, Any]]:
+        """
+        多次爬取合并，使用收敛检测判断数据完整性。
+        
+        收敛检测：连续N次遍历无新增数据，则认为数据完整。
+        这比依赖 totalAnnouncement 更可靠，因为API的 totalAnnouncement 存在动态波动问题。
+        
+        问题复现日期: 2022-07-15 (totalAnnouncement=972, 实际可爬取974条)
+        
+        Args:
+            date_range: 日期范围
+            plate: 板块
+            check_split: 是否检查需要拆分查询（首次尝试时检查）
+        
+        Returns:
+            去重后的完整数据列表
+        """
+        data_by_id: Dict[str, Dict[str, Any]] = {}
+        max_total = 0
+        consecutive_no_new = 0  # 连续无新增的次数
+        prev_unique_count = 0
+        first_pass_total = 0  # 首遍恰好取满时的 totalAnnouncement，用于快速确认
+
+        for attempt in range(1, self.MAX_MERGE_ATTEMPTS + 1):
+            # 仅首次尝试时检查是否需要分板块
+            current_max = self._fetch_single_pass(
+                date_range, plate, data_by_id,
+                check_split=(attempt == 1 and check_split), expected_total=max_total
+            )
+            
+            # 需要拆分查询：多日窗口先二分日期，单日仍超限再分板块
+            if current_max == -1:
+                halves = DateRangeGenerator.split_range(date_range)
+                if halves:
+                    return self._fetch_by_split_ranges(halves, plate)
+                return self._fetch_by_split_plates(date_range)
+            
+            max_total = max(max_total, current_max)
+            if self.config.verbose:
+                print()  # 换行
+            
+            unique_count = len(data_by_id)
+            new_count = unique_count - prev_unique_count
+            prev_unique_count = unique_count
+            
+            # 无数据情况（首次尝试且无数据）
+            if attempt == 1 and current_max == 0:
+                logging.info(f"日期 {date_range} (plate={plate}): 无公告数据")
+                return []
+            
+            # 收敛检测：检查是否有新增数据
+            if new_count == 0:
+                consecutive_no_new += 1
+            else:
+                consecutive_no_new = 0  # 重置
+            
+            # 快速确认：首遍已恰好取满 totalAnnouncement，第二遍总数不变且无新增，
+            # 视为数据稳定直接返回；总数波动（如报告972条实际974条）时仍走完整收敛检测
+            if attempt == 1 and unique_count == current_max:
+                first_pass_total = current_max
+            elif attempt == 2 and first_pass_total and new_count == 0 and current_max == first_pass_total:
+                return list(data_by_id.values())
+
+            # 收敛成功：连续N次无新增
+            if consecutive_no_new >= self.CONVERGENCE_THRESHOLD:
+                if attempt > self.CONVERGENCE_THRESHOLD:
+                    logging.info(
+                        f"日期 {date_range} (plate={plate}): 第{attempt}次尝试后收敛，"
+                        f"共{unique_count}条 (API报告: {max_total})"
+                    )
+                return list(data_by_id.values())
+            
+            # 记录进度（仅在有新增时）
+            if new_count > 0 and attempt > 1:
+                logging.debug(
+                    f"日期 {date_range} (plate={plate}): 第{attempt}次尝试，"
+                    f"新增{new_count}条，累计{unique_count}条"
+                )
+            
+            self._pace()
+
+        # 超过最大尝试次数仍未收敛
+        raise RuntimeError(
+            f"数据收敛失败: {date_range} (plate={plate}) "
+            f"经过{self.MAX_MERGE_ATTEMPTS}次尝试仍有新数据，"
+            f"当前唯一数量: {len(data_by_id)}, API报告: {max_total}"
+        )
+
+    def _fetch_by_split_ranges(self, date_ranges: Tuple[str, str], plate: str) -> List[Dict[str, Any]]:
+        """
+        二分日期窗口分别查询，用于按月等宽窗口超过API的3000条限制时。
+        子窗口仍超限会继续二分，直到单日后改为分板块查询。
+        """
+        # 以公告ID为键合并，字典同时承担去重和保序
+        merged: Dict[Any, Dict[str, Any]] = {}
+
+        for sub_range in date_ranges:
+            logging.info(f"  拆分日期查询: {sub_range} plate={plate}")
+            for item in self._fetch_with_retry(sub_range, plate, check_split=True):
+                merged.setdefault(item.get("announcementId"), item)
+
+        return list(merged.values())
+
+    def _fetch_by_split_plates(self, date_range: str) -> List[Dict[str, Any]]:
+        """
+        分板块查询数据，用于绕过API的3000条限制。
+        将 "sz;sh" 拆分为单独的 "sz" 和 "sh" 分别查询。
+        """
+        plates = [p.strip() for p in self.config.plate.split(";") if p.strip()]
+        if len(plates) <= 1:
+            raise RuntimeError(
+                f"无法分板块查询: 配置的plate='{self.config.plate}'只有一个板块，"
+                f"但日期{date_range}数据量超过{self.API_MAX_RESULTS}条限制"
+            )
+        
+        # 以公告ID为键合并，字典同时承担去重和保序
+        merged: Dict[Any, Dict[str, Any]] = {}
+        
+        for plate in plates:
+            logging.info(f"  分板块查询: {date_range} plate={plate}")
+            plate_results = self._fetch_with_retry(date_range, plate)
+            
+            # 去重合并（理论上不同板块不会重复，但保险起见）
+            for item in plate_results:
+                merged.setdefault(item.get("announcementId"), item)
+            
+            logging.info(f"    板块 {plate} 获取 {len(plate_results)} 条，累计 {len(merged)} 条")
+        
+        return list(merged.values())
+
+    def fetch_all_pages(self, date_range: str, plate_override: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        获取指定日期范围的所有页面数据（支持多次重试合并）。
+        
+        Args:
+            date_range: 日期范围，格式 "YYYY-MM-DD~YYYY-MM-DD"
+            plate_override: 可选，覆盖配置中的板块设置（用于分板块查询）
+        
+        Returns:
+            去重后的完整数据列表
+        """
+        current_plate = plate_override if plate_override else self.config.plate
+        
+        return self._fetch_with_retry(date_range, current_plate, check_split=(plate_override is None))
+
+
+class DateRangeGenerator:
+    """日期范围生成器。"""
+
+    @staticmethod
+    def generate_ranges(
+        start_date: str, end_date: str, granularity: str, merge_non_trading_days: bool = False
+    ) -> List[str]:
+        """按配置的粒度生成日期范围列表。"""
+        if granularity == "day":
+            if merge_non_trading_days:
+                return DateRangeGenerator.generate_trading_day_ranges(start_date, end_date)
+            return DateRangeGenerator.generate_daily_ranges(start_date, end_date)
+        if granularity == "month":
+            return DateRangeGenerator.generate_monthly_ranges(start_date, end_date)
+        raise ValueError(f"不支持的日期粒度: {granularity}，可选 day/month")
+
+    @staticmethod
+    def generate_daily_ranges(start_date: str, end_date: str) -> List[str]:
+        """生成日期范围列表（按天）。"""
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = min(datetime.strptime(end_date, "%Y-%m-%d").date(), datetime.now().date())
+        # date 的 str() 即 YYYY-MM-DD，省去逐日 strftime
+        days = (start + timedelta(days=i) for i in range((end - start).days + 1))
+        return [f"{day}~{day}" for day in days]
+
+    @staticmethod
+    def _is_trading_day(day: date) -> bool:
+        """判断是否为A股交易日；未安装 chinese_calendar 或超出其支持年份时只排除周末。"""
+        if day.weekday() >= 5:
+            return False
+        if chinese_calendar is None:
+            return True
+        try:
+            return chinese_calendar.is_workday(day)
+        except NotImplementedError:
+            return True
+
+    @staticmethod
+    def generate_trading_day_ranges(start_date: str, end_date: str) -> List[str]:
+        """
+        生成日期范围列表（按交易日）。
+
+        非交易日并入前一个交易日的窗口（如 周五~周日），而不是直接跳过：
+        巨潮偶尔在休市日发布公告，合并查询既省去这些日子的单独请求，又不会漏数据。
+        """
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = min(datetime.strptime(end_date, "%Y-%m-%d").date(), datetime.now().date())
+        if start > end:
+            return []
+        ranges = []
+        range_start = start
+        for offset in range(1, (end - start).days + 1):
+            day = start + timedelta(days=offset)
+            if DateRangeGenerator._is_trading_day(day):
+                ranges.append(f"{range_start}~{day - timedelta(days=1)}")
+                range_start = day
+        ranges.append(f"{range_start}~{end}")
+        return ranges
+
+    @staticmethod
+    def generate_monthly_ranges(start_date: str, end_date: str) -> List[str]:
+        """生成日期范围列表（按自然月，首尾月按起止日期截断）。"""
+        ranges = []
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = min(datetime.strptime(end_date, "%Y-%m-%d").date(), datetime.now().date())
+
+        current = start
+        while current <= end:
+            last_day = calendar.monthrange(current.year, current.month)[1]
+            month_end = min(current.replace(day=last_day), end)
+            ranges.append(f"{current:%Y-%m-%d}~{month_end:%Y-%m-%d}")
+            current = month_end + timedelta(days=1)
+
+        return ranges
+
+    @staticmethod
+    def split_range(date_range: str) -> Optional[Tuple[str, str]]:
+        """将日期范围对半拆分；单日范围无法拆分，返回None。"""
+        start_str, end_str = date_range.split("~")
+        start = datetime.strptime(start_str, "%Y-%m-%d")
+        end = datetime.strptime(end_str, "%Y-%m-%d")
+        if start >= end:
+            return None
+        mid = start + timedelta(days=(end - start).days // 2)
+        return (
+            f"{start_str}~{mid:%Y-%m-%d}",
+            f"{mid + timedelta(days=1):%Y-%m-%d}~{end_str}",
+        )
+
+    @staticmethod
+    def trim_completed(date_ranges: List[str], last_completed: str) -> List[str]:
+        """
+        剔除已完成的日期：整段已完成的范围丢弃，部分完成的范围从下一天开始。
+        兼容按天粒度留下的进度文件。
+        """
+        next_day = (datetime.strptime(last_completed, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        remaining = []
+        for date_range in date_ranges:
+            start_str, end_str = date_range.split("~")
+            if end_str <= last_completed:
+                continue
+            if start_str <= last_completed:
+                date_range = f"{next_day}~{end_str}"
+            remaining.append(date_range)
+        return remaining
+
+
+class AnnouncementCrawler:
+    """
+    公告爬虫基类：公告解析、CSV写入与按日期顺序的并发抓取。
+    子类负责 run() 及进度文件的读写；输出列与 CSV_HEADERS 不同时覆盖 _parse_announcement。
+    """
+
+    CSV_HEADERS = [
+        "company_code", "company_name", "title",
+        "announcement_time", "announcement_id", "url"
+    ]
+    # CSV写缓冲大小，配合 save_interval 批量落盘
+    CSV_BUFFER_SIZE = 1 << 20
+    # 续爬时从CSV末尾向前检查的块大小
+    CSV_TAIL_BLOCK = 64 * 1024
+    # 解析公告必须存在的字段
+    REQUIRED_FIELDS = ("announcementTitle", "announcementTime", "secCode", "secName", "adjunctUrl")
+    # 一次调用按 REQUIRED_FIELDS 顺序取出全部字段，比逐个下标取值少走几轮字节码
+    FIELD_GETTER = itemgetter(*REQUIRED_FIELDS)
+    # 标题中的HTML高亮标签（如 <em>），预编译避免逐条查正则缓存；
+    # 用否定字符类代替惰性匹配，逐字符推进时无需反复尝试结束符
+    TAG_PATTERN = re.compile(r"<[^>]*>")
+    # 公告PDF下载地址前缀
+    URL_PREFIX = "http://static.cninfo.com.cn/"
+    # announcement_time / announcement_id 在 CSV_HEADERS 中的列位置
+    TIME_COLUMN = 3
+    ID_COLUMN = 4
+
+    def __init__(self, config: CrawlerConfig) -> None:
+        self.config = config
+        self.client = CNINFOClient(config)
+        # 排除关键词合并为一个正则，单次扫描标题即可判断是否命中任一关键词
+        self._exclude_pattern: Optional[re.Pattern] = (
+            re.compile("|".join(map(re.escape, config.exclude_keywords)))
+            if config.exclude_keywords else None
+        )
+        # 上次运行在最后一次进度提交之后已写入CSV的公告ID，续爬时跳过，避免重复写入
+        self._written_ids: set = set()
+
+    def _clean_title(self, title: str) -> str:
+        return "《" + self.TAG_PATTERN.sub("", title.strip()).replace("：", "") + "》"
+
+    def _should_exclude(self, title: str) -> bool:
+        return self._exclude_pattern is not None and self._exclude_pattern.search(title) is not None
+
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def _parse_announcement_time(timestamp_ms: int) -> str:
+        """
+        解析公告时间戳为Asia/Shanghai时间。
+        上海自1992年起固定为UTC+8、无夏令时，直接按偏移换算，免去逐条构造时区和datetime对象；
+        同一批公告的时间戳大量重复（多为当日零点），再加一层缓存。
+        """
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(timestamp_ms // 1000 + SHANGHAI_UTC_OFFSET))
+
+    def _parse_announcement(self, item: Dict[str, Any]) -> Optional[Tuple[str, ...]]:
+        """
+        解析单条公告数据，返回按 CSV_HEADERS 顺序排列的元组。
+        返回None仅表示被排除关键词过滤，其他情况严格抛出异常。
+        """
+        # 严格校验必要字段存在性：取值即校验，缺字段时才逐个找出缺失项
+        try:
+            raw_title, announcement_time, sec_code, sec_name, adjunct_url = self.FIELD_GETTER(item)
+        except KeyError:
+            missing_fields = [f for f in self.REQUIRED_FIELDS if f not in item]
+            raise RuntimeError(f"解析公告数据失败，缺少必要字段: {missing_fields}。数据: {item}") from None
+
+        title = self._clean_title(raw_title)
+
+        # 排除关键词过滤 - 唯一允许返回None的情况
+        if self._should_exclude(title):
+            # 逐条公告调用：用惰性格式化，DEBUG 未开启时不拼接字符串
+            logging.debug("关键词过滤: %s", title)
+            return None
+
+        # 提取公告日期
+        if not isinstance(announcement_time, (int, float)):
+            raise RuntimeError(
+                f"announcementTime类型异常，期望数值，实际: {type(announcement_time).__name__}。标题: {title}"
+            )
+        announcement_time_str = self._parse_announcement_time(int(announcement_time))
+
+        # 严格校验公告ID字段
+        announcement_id = item.get("announcementId")
+        if announcement_id is None:
+            raise RuntimeError(f"缺少announcementId字段，无法唯一标识公告: {title}")
+
+        return (
+            sec_code,
+            sec_name,
+            title,
+            announcement_time_str,
+            str(announcement_id),
+            self.URL_PREFIX + adjunct_url,
+        )
+
+    def _write_batch(self, results: List[Dict[str, Any]]) -> int:
+        """
+        逐条解析一个日期范围的公告并直接写入CSV缓冲（由 _commit_progress 统一落盘），
+        不再构建中间行列表；本批次内重复（分页偏移）或上次中断前已写入的公告ID直接跳过。
+        不同日期范围的公告互不重叠，去重集合只需覆盖当前批次，内存不随运行时长增长。
+        返回写入条数，其余为被关键词过滤或重复的条数。
+        解析和写入方法预先绑定为局部变量，省去循环内的属性查找。
+        """
+        parse = self._parse_announcement
+        writerow = self._csv_writer.writerow
+        resumed = self._written_ids
+        seen: set = set()
+        saved = 0
+        for item in results:
+            row = parse(item)
+            if row is None:
+                continue
+            ann_id = row[self.ID_COLUMN]
+            if ann_id in seen or ann_id in resumed:
+                continue
+            seen.add(ann_id)
+            writerow(row)
+            saved += 1
+        return saved
+
+    def _load_written_ids(self, output_path: Path, last_completed: Optional[str]) -> set:
+        """
+        读取最后一次进度提交之后写入CSV的公告ID。上次运行若中断在两次进度提交之间，
+        CSV会比进度文件多出一段已写入的数据，续爬时据此跳过，避免产生重复行。
+        CSV按日期顺序追加：从文件末尾按块向前读，遇到公告日期不晚于 last_completed 的行即停止，
+        只解析未提交的那一小段，启动开销不随历史数据增长。
+        """
+        ids: set = set()
+        if not output_path.exists():
+            return ids
+        with open(output_path, 'rb') as f:
+            pos = f.seek(0, os.SEEK_END)
+            carry = b""
+            while pos > 0:
+                step = min(self.CSV_TAIL_BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                lines = (f.read(step) + carry).split(b"\n")
+                # 块首可能是不完整的行，留到与前一块拼接后再解析
+                carry = lines.pop(0) if pos > 0 else b""
+                for line in reversed(lines):
+                    row = next(csv.reader([line.decode('utf-8-sig', errors='replace')]), None)
+                    if not row or len(row) <= self.ID_COLUMN or not row[self.TIME_COLUMN][:1].isdigit():
+                        continue
+                    if last_completed and row[self.TIME_COLUMN][:10] <= last_completed:
+                        return ids
+                    ids.add(row[self.ID_COLUMN])
+        return ids
+
+    @classmethod
+    def _truncate_partial_row(cls, output_path: Path) -> None:
+        """
+        上次运行被强杀时，写缓冲可能只落盘了半行：截断到最后一个换行符，
+        避免续爬追加的第一行接在残行后面，损坏两条记录。
+        """
+        if not output_path.exists():
+            return
+        with open(output_path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            pos = size
+            keep = 0
+            while pos > 0:
+                step = min(cls.CSV_TAIL_BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                idx = f.read(step).rfind(b"\n")
+                if idx != -1:
+                    keep = pos + idx + 1
+                    break
+            if keep < size:
+                logging.warning(f"CSV末尾有 {size - keep} 字节的不完整行（上次运行中断），已截断: {output_path}")
+                f.truncate(keep)
+
+    def _init_csv(self, output_path: Path, last_completed: Optional[str] = None) -> TextIO:
+        """
+        打开CSV文件（整个运行期间复用同一句柄），空文件先写入BOM和表头。
+        BOM 只在文件开头需要（便于Excel识别编码），之后按普通 utf-8 追加。
+        last_completed 为进度文件记录的最后完成日期，用于确定需要去重的未提交区段。
+        """
+        self._truncate_partial_row(output_path)
+        self._written_ids = self._load_written_ids(output_path, last_completed)
+        csv_file = open(
+            output_path, 'a', newline='', encoding='utf-8', buffering=self.CSV_BUFFER_SIZE
+        )
+        self._csv_writer = csv.writer(csv_file)
+        # 追加模式打开后位置即文件末尾：为0说明是新文件或上次中断留下的空文件
+        if csv_file.tell() == 0:
+            csv_file.write("\ufeff")
+            self._csv_writer.writerow(self.CSV_HEADERS)
+        return csv_file
+
+    def _iter_fetched(self, date_ranges: List[str]) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        并发抓取多个日期，但严格按 date_ranges 顺序产出结果。
+
+        进度文件只记录“最后完成日期”，写入CSV和进度必须保持日期顺序；
+        这里用滑动窗口预取后续日期，窗口为并发数的2倍，避免结果堆积占用内存。
+        """
+        workers = max(1, self.config.concurrency)
+        ranges = iter(date_ranges)
+        pending: deque = deque()
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            for date_range in islice(ranges, workers * 2):
+                pending.append((date_range, executor.submit(self.client.fetch_all_pages, date_range)))
+
+            while pending:
+                date_range, future = pending.popleft()
+                results = future.result()
+                next_range = next(ranges, None)
+                if next_range is not None:
+                    pending.append((next_range, executor.submit(self.client.fetch_all_pages, next_range)))
+                yield date_range, results
+        finally:
+            # 异常退出时取消尚未开始的日期，已在途的请求自然结束
+            executor.shutdown(wait=True, cancel_futures=True)